@@ -0,0 +1,77 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class BackendBusy(Exception):
+    """Raised when a model call can't be admitted because the backend is saturated."""
+
+
+class AdmissionGate:
+    """Bounded concurrency gate with a bounded wait queue in front of the model backend.
+
+    At most max_concurrent calls run at once and at most max_waiting more wait
+    for a slot, each for up to max_wait seconds. Anything beyond that is
+    rejected straight away with BackendBusy instead of piling up inside the
+    backend, where every request would slow down together.
+    """
+
+    def __init__(self, max_concurrent=4, max_waiting=16, max_wait=30):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+        self.cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @contextmanager
+    def admit(self):
+        """Hold a backend slot for the duration of the block, or raise BackendBusy."""
+        start = time.monotonic()
+        with self.cond:
+            if self.active >= self.max_concurrent:
+                if self.waiting >= self.max_waiting:
+                    self.rejected += 1
+                    raise BackendBusy(f"{self.active} model calls running and {self.waiting} waiting")
+                self.waiting += 1
+                try:
+                    deadline = start + self.max_wait
+                    while self.active >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.timed_out += 1
+                            raise BackendBusy(f"no model slot free after waiting {self.max_wait}s")
+                        self.cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.active += 1
+            self.admitted += 1
+            waited = time.monotonic() - start
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.active -= 1
+                self.cond.notify()
+
+    def stats(self):
+        """Current load and lifetime counters, for sizing the backend."""
+        with self.cond:
+            return {
+                'active': self.active,
+                'waiting': self.waiting,
+                'max_concurrent': self.max_concurrent,
+                'max_waiting': self.max_waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'avg_wait': self.wait_total / self.admitted if self.admitted else 0.0,
+                'max_wait': self.wait_max,
+            }
@@ -0,0 +1,206 @@
+"""JSON HTTP API for quiz generation, used by index.html and quiz.html.
+
+Endpoints:
+
+    POST /api/quiz          JSON body: topic, easy, medium, hard, question_type,
+                            parallel, regenerate, use_bank
+    POST /api/quiz/upload   multipart form: file plus the fields above and
+                            page_range, use_index, map_reduce
+    GET  /api/pdf/{pdf_id}  PDF of a quiz returned by either endpoint
+    GET  /api/status        model backend load (running and queued calls,
+                            wait times, rejections), per-backend load and
+                            health, coalesced requests, cache hit rate and
+                            question bank stock kept by pre-generation
+    GET  /metrics           per-stage latency histograms (file extraction,
+                            prompt size, time to first token, tokens/sec,
+                            stream, parse, retries, fallbacks, markdown and
+                            PDF) in the Prometheus text format
+
+Quizzes are returned as structured questions (title, question_type,
+easy/medium/hard lists of {text, options, answer}) for the client to render.
+When the model backend is saturated and the cache and question bank can't
+serve a request, it gets a 503 with Retry-After instead of queueing.
+Invalid requests get a 400 and failures inside the pipeline a 500.
+Generation runs on a dedicated thread pool (API_WORKERS), so requests don't
+wait on Gradio's event queue and the event loop stays free for new requests.
+
+Usage: python api.py  (serves the pages at http://127.0.0.1:8000/)
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, File, Form, Header, HTTPException, UploadFile
+from fastapi.responses import FileResponse, PlainTextResponse
+from pydantic import BaseModel
+
+import quiz_core
+from structured_log import new_request_id
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+UPLOAD_TYPES = ('.pdf', '.txt', '.docx')
+MAX_PDF_LINKS = 256
+# Seconds a client told the backend is busy should wait before retrying
+RETRY_AFTER = os.getenv("API_RETRY_AFTER", "5")
+
+executor = ThreadPoolExecutor(max_workers=int(os.getenv("API_WORKERS", "4")), thread_name_prefix="api")
+pdf_links = OrderedDict()
+pdf_links_lock = threading.Lock()
+
+@asynccontextmanager
+async def lifespan(app):
+    quiz_core.init()
+    yield
+
+
+api = FastAPI(title="AI Quiz Generator", lifespan=lifespan)
+
+
+class QuizRequest(BaseModel):
+    topic: str
+    easy: int = 0
+    medium: int = 0
+    hard: int = 0
+    question_type: str = "MCQ"
+    parallel: bool = False
+    regenerate: bool = False
+    use_bank: bool = True
+
+
+def link_pdf(path):
+    """Register a quiz PDF for download and return its id, forgetting the oldest links."""
+    pdf_id = uuid.uuid4().hex
+    with pdf_links_lock:
+        pdf_links[pdf_id] = path
+        while len(pdf_links) > MAX_PDF_LINKS:
+            pdf_links.popitem(last=False)
+    return pdf_id
+
+
+def save_upload(source, suffix):
+    """Copy an uploaded file to a temp file, since the pipeline reads uploads from disk like Gradio's, and return its path."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        shutil.copyfileobj(source, temp_file)
+    return temp_file.name
+
+
+async def generate(file, topic, easy, medium, hard, question_type, request_id=None, **options):
+    """Run the quiz pipeline on the API thread pool and return the response body.
+
+    request_id (the client's X-Request-ID, or a new one) tags the request's
+    log lines and is returned in the body or the error's X-Request-ID header.
+    """
+    request_id = request_id or new_request_id()
+    loop = asyncio.get_running_loop()
+    update = await loop.run_in_executor(
+        executor,
+        lambda: quiz_core.run_quiz(file, topic, easy + medium + hard, easy, medium, hard, question_type, request_id=request_id, **options)
+    )
+    if update is not None and update['busy']:
+        raise HTTPException(
+            status_code=503, detail=quiz_core.error_text(update['markdown']),
+            headers={'Retry-After': RETRY_AFTER, 'X-Request-ID': request_id}
+        )
+    if update is None or update['internal']:
+        raise HTTPException(
+            status_code=500, detail=quiz_core.error_text(update['markdown']) if update else "Error: No result",
+            headers={'X-Request-ID': request_id}
+        )
+    if update['error']:
+        raise HTTPException(
+            status_code=400, detail=quiz_core.error_text(update['markdown']),
+            headers={'X-Request-ID': request_id}
+        )
+    pdf_id = link_pdf(update['pdf'])
+    return {**update['quiz'], 'pdf_url': f"/api/pdf/{pdf_id}", 'request_id': request_id}
+
+
+@api.post("/api/quiz")
+async def create_quiz(request: QuizRequest, x_request_id: str = Header(None)):
+    return await generate(
+        None, request.topic, request.easy, request.medium, request.hard, request.question_type, x_request_id,
+        parallel=request.parallel, regenerate=request.regenerate, use_bank=request.use_bank
+    )
+
+
+@api.post("/api/quiz/upload")
+async def create_quiz_from_file(
+    file: UploadFile = File(...),
+    topic: str = Form(""),
+    easy: int = Form(0),
+    medium: int = Form(0),
+    hard: int = Form(0),
+    question_type: str = Form("MCQ"),
+    page_range: str = Form(""),
+    parallel: bool = Form(False),
+    regenerate: bool = Form(False),
+    use_index: bool = Form(False),
+    map_reduce: bool = Form(False),
+    use_bank: bool = Form(True),
+    x_request_id: str = Header(None)
+):
+    suffix = os.path.splitext(file.filename or "")[1].lower()
+    if suffix not in UPLOAD_TYPES:
+        raise HTTPException(status_code=400, detail="Error: Unsupported file type. Please upload a PDF, TXT, or DOCX file.")
+
+    # Large uploads take a while to write out, so the copy runs on the API pool rather than the event loop
+    path = await asyncio.get_running_loop().run_in_executor(executor, save_upload, file.file, suffix)
+    try:
+        return await generate(
+            quiz_core.UploadedFile(path), topic, easy, medium, hard, question_type, x_request_id,
+            parallel=parallel, regenerate=regenerate, page_range=page_range,
+            use_index=use_index, map_reduce=map_reduce, use_bank=use_bank
+        )
+    finally:
+        os.remove(path)
+
+
+@api.get("/api/pdf/{pdf_id}")
+def download_pdf(pdf_id: str):
+    with pdf_links_lock:
+        path = pdf_links.get(pdf_id)
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Error: PDF not found or expired.")
+    return FileResponse(path, media_type="application/pdf", filename="quiz.pdf")
+
+
+@api.get("/api/status")
+def status():
+    return {
+        'model_gate': quiz_core.model_gate.stats(),
+        'breaker': quiz_core.model_breaker.stats(),
+        'backends': quiz_core.backend_pool.stats(),
+        'quiz_flights': quiz_core.quiz_flights.stats(),
+        'quiz_cache': quiz_core.quiz_cache.stats(),
+        'pregen': quiz_core.pregen_worker.stats(),
+    }
+
+
+@api.get("/metrics")
+def metrics():
+    return PlainTextResponse(quiz_core.metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+# Serve the static pages from the same origin as the API
+@api.get("/")
+def index_page():
+    return FileResponse(os.path.join(BASE_DIR, "index.html"))
+
+
+@api.get("/{page}.html")
+def static_page(page: str):
+    if page not in ("index", "quiz"):
+        raise HTTPException(status_code=404, detail="Not found")
+    return FileResponse(os.path.join(BASE_DIR, f"{page}.html"))
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(api, host=os.getenv("API_HOST", "127.0.0.1"), port=int(os.getenv("API_PORT", "8000")))
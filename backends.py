@@ -0,0 +1,206 @@
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+log = logging.getLogger("quiz.backends")
+
+
+# openai (and httpx under it) is slow to import, so it is loaded on first use rather than at startup
+def api_error():
+    """Base class of every openai client error."""
+    from openai import OpenAIError
+    return OpenAIError
+
+
+def node_errors():
+    """Errors that say the node itself is unhealthy, as opposed to a bad request."""
+    from openai import APIConnectionError, InternalServerError
+    return (APIConnectionError, InternalServerError)
+
+
+def duration_seconds(value):
+    """Seconds in an Ollama keep_alive value ("30m", "1h", "300"), or None for a negative one (kept loaded forever)."""
+    value = str(value).strip().lower()
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    seconds = float(value[:-1]) * units[value[-1]] if value and value[-1] in units else float(value)
+    return None if seconds < 0 else seconds
+
+
+def parse_backends(spec, default_url):
+    """Split a comma-separated list of OpenAI-compatible base URLs, falling back to default_url."""
+    urls = [url.strip() for url in (spec or "").split(",") if url.strip()]
+    return urls or [default_url]
+
+
+class Backend:
+    """One OpenAI-compatible server (e.g. an Ollama instance) and its load and health state."""
+
+    def __init__(self, url, api_key="ollama"):
+        self.url = url
+        # Ollama's native API (model loading, keep-alive) lives beside the OpenAI-compatible /v1 routes
+        self.native_url = url.rstrip('/').removesuffix('/v1')
+        self.api_key = api_key
+        self._client = None
+        self._client_lock = threading.Lock()
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def client(self):
+        """The backend's OpenAI client, created on first use."""
+        with self._client_lock:
+            if self._client is None:
+                from openai import OpenAI
+
+                # One client per backend, so its HTTP connection pool is reused across requests.
+                # Retries are left to the app's retry policy rather than stacked inside the client.
+                self._client = OpenAI(base_url=self.url, api_key=self.api_key, max_retries=0)
+            return self._client
+
+    def available(self, now):
+        return self.ejected_until <= now
+
+
+class BackendPool:
+    """Route model calls across several backends by least outstanding requests.
+
+    A backend is ejected for eject_seconds after max_failures consecutive
+    node errors (connection failures, timeouts, 5xx) and readmitted once that
+    time has passed or a health check succeeds. When started, a daemon thread
+    probes every backend's model list each health_interval seconds and
+    ejects or readmits it on the result. If every backend is ejected, calls
+    still go to the least loaded one rather than failing outright.
+    """
+
+    def __init__(self, urls, api_key="ollama", max_failures=3, eject_seconds=30, health_interval=10, health_timeout=5):
+        self.backends = [Backend(url, api_key) for url in urls]
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.lock = threading.Lock()
+        # Rotating start point, so ties in load don't always go to the first backend
+        self.turn = itertools.count()
+        self.stop_event = threading.Event()
+
+    def pick(self):
+        """Reserve the available backend with the fewest outstanding requests."""
+        now = time.monotonic()
+        with self.lock:
+            start = next(self.turn) % len(self.backends)
+            rotated = self.backends[start:] + self.backends[:start]
+            candidates = [b for b in rotated if b.available(now)] or rotated
+            backend = min(candidates, key=lambda b: b.outstanding)
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    @contextmanager
+    def acquire(self):
+        """Hold a backend for the duration of the block, recording whether the call failed."""
+        backend = self.pick()
+        try:
+            yield backend
+        except node_errors():
+            self.report(backend, ok=False)
+            raise
+        else:
+            self.report(backend, ok=True)
+        finally:
+            with self.lock:
+                backend.outstanding -= 1
+
+    def report(self, backend, ok):
+        with self.lock:
+            if ok:
+                backend.failures = 0
+                backend.ejected_until = 0.0
+                return
+            backend.errors += 1
+            backend.failures += 1
+            if backend.failures >= self.max_failures and backend.available(time.monotonic()):
+                backend.ejected_until = time.monotonic() + self.eject_seconds
+                log.warning(f"Ejected {backend.url} for {self.eject_seconds}s after {backend.failures} failures.")
+
+    def check(self, backend):
+        """Probe a backend's model list and update its health."""
+        try:
+            backend.client.with_options(timeout=self.health_timeout, max_retries=0).models.list()
+        except Exception:
+            self.report(backend, ok=False)
+            return False
+        if not backend.available(time.monotonic()):
+            log.info(f"{backend.url} passed its health check, readmitting it.")
+        self.report(backend, ok=True)
+        return True
+
+    def warm_up(self, backend, model, keep_alive):
+        """Load model on a backend and keep it resident for keep_alive (an Ollama duration such as "30m")."""
+        import httpx
+
+        started = time.monotonic()
+        try:
+            response = httpx.post(
+                f"{backend.native_url}/api/generate", json={'model': model, 'keep_alive': keep_alive}, timeout=300
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            log.warning(f"Warm-up of {model} on {backend.url} failed: {str(e)}")
+            return False
+        log.info(f"{model} warm on {backend.url} ({time.monotonic() - started:.1f}s).")
+        return True
+
+    def keep_warm(self, model, keep_alive, interval, idle_for=None):
+        """Warm model on every backend now, then every interval seconds so idle gaps don't unload it.
+
+        Requests through the OpenAI-compatible API reset Ollama's keep-alive to
+        the server default, so the native load is repeated to extend it again.
+        With idle_for (seconds since the last live request), the load is only
+        repeated while there was a request within the keep_alive window, so an
+        unused app lets the model unload.
+        """
+        window = duration_seconds(keep_alive)
+
+        def loop():
+            refresh = True
+            while True:
+                if refresh:
+                    for backend in self.backends:
+                        self.warm_up(backend, model, keep_alive)
+                if not interval or self.stop_event.wait(interval):
+                    return
+                refresh = idle_for is None or window is None or idle_for() < window
+
+        threading.Thread(target=loop, daemon=True, name="backend-warmup").start()
+
+    def start(self):
+        """Start periodic health checks on a daemon thread."""
+        threading.Thread(target=self._health_loop, daemon=True, name="backend-health").start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _health_loop(self):
+        while not self.stop_event.wait(self.health_interval):
+            for backend in self.backends:
+                self.check(backend)
+
+    def stats(self):
+        """Load and health of every backend."""
+        now = time.monotonic()
+        with self.lock:
+            return [
+                {
+                    'url': b.url,
+                    'healthy': b.available(now),
+                    'outstanding': b.outstanding,
+                    'requests': b.requests,
+                    'errors': b.errors,
+                }
+                for b in self.backends
+            ]
@@ -0,0 +1,153 @@
+"""Generate many quizzes from a manifest without the Gradio UI.
+
+Each manifest row describes one quiz. JSONL rows are objects; CSV files use a
+header row. Supported fields:
+
+    id             output file name (defaults to the row number)
+    topic / file   quiz topic, or path to a PDF, TXT or DOCX file
+    easy, medium, hard
+                   question counts per difficulty
+    question_type  MCQ (default), True/False, Fill in the Blank or Subjective
+    page_range, parallel, use_index, map_reduce, use_bank
+                   same as the options in the app
+
+For every finished quiz, <id>.md, <id>.pdf and <id>.json are written to the
+output directory. Every outcome is appended to journal.jsonl there. Re-running
+the same command resumes the batch and skips quizzes already marked done.
+
+Usage: python batch.py manifest.jsonl --out quizzes --concurrency 4
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import quiz_core
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+
+
+def read_manifest(path):
+    """Load manifest rows from a JSONL or CSV file, giving each an id."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.lower().endswith('.csv'):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    for number, row in enumerate(rows, 1):
+        row['id'] = str(row.get('id') or number)
+    return rows
+
+
+def as_bool(value, default=False):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def read_journal(path):
+    """Return the ids of jobs the journal records as done."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A line cut short by an interrupted run
+                continue
+            if entry.get('status') == 'done':
+                done.add(entry['id'])
+    return done
+
+
+class Journal:
+    """Append-only, fsynced record of finished jobs shared by the worker threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def write(self, entry):
+        line = json.dumps(entry) + "\n"
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def run_job(row, out_dir):
+    """Generate one quiz, write its markdown, PDF and JSON outputs and return (quiz, seconds)."""
+    started = time.time()
+    easy = int(row.get('easy') or 0)
+    medium = int(row.get('medium') or 0)
+    hard = int(row.get('hard') or 0)
+    file = quiz_core.UploadedFile(row['file']) if row.get('file') else None
+
+    update = quiz_core.run_quiz(
+        file, row.get('topic') or "", easy + medium + hard, easy, medium, hard,
+        row.get('question_type') or "MCQ",
+        parallel=as_bool(row.get('parallel')),
+        page_range=row.get('page_range') or "",
+        use_index=as_bool(row.get('use_index')),
+        map_reduce=as_bool(row.get('map_reduce')),
+        use_bank=as_bool(row.get('use_bank'), True),
+        # Ties the job's log lines to its manifest row
+        request_id=f"batch-{row['id']}"
+    )
+    if update is None or update['error']:
+        raise RuntimeError(quiz_core.error_text(update['markdown']) if update else "No result")
+
+    base = os.path.join(out_dir, row['id'])
+    with open(base + '.md', 'w', encoding='utf-8') as f:
+        f.write(update['markdown'])
+    shutil.copyfile(update['pdf'], base + '.pdf')
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump(update['quiz'], f, indent=2)
+    return update['quiz'], round(time.time() - started, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate quizzes in bulk from a JSONL or CSV manifest.")
+    parser.add_argument("manifest", help="path to a .jsonl or .csv manifest")
+    parser.add_argument("--out", default="quizzes", help="output directory (default: quizzes)")
+    parser.add_argument("--concurrency", type=int, default=2, help="quizzes generated at once (default: 2)")
+    args = parser.parse_args()
+
+    quiz_core.init()
+    os.makedirs(args.out, exist_ok=True)
+    journal_path = os.path.join(args.out, "journal.jsonl")
+    rows = read_manifest(args.manifest)
+    done = read_journal(journal_path)
+    pending = [row for row in rows if row['id'] not in done]
+    print(f"{len(rows)} jobs in manifest, {len(rows) - len(pending)} already done, {len(pending)} to run.")
+
+    journal = Journal(journal_path)
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        futures = {executor.submit(run_job, row, args.out): row for row in pending}
+        for future in as_completed(futures):
+            row = futures[future]
+            try:
+                quiz, elapsed = future.result()
+                journal.write({'id': row['id'], 'status': 'done', 'seconds': elapsed, 'used_fallback': quiz['used_fallback']})
+                print(f"[{row['id']}] done in {elapsed}s")
+            except Exception as e:
+                failed += 1
+                journal.write({'id': row['id'], 'status': 'failed', 'error': str(e)})
+                print(f"[{row['id']}] failed: {str(e)}")
+
+    print(f"Finished: {len(pending) - failed} generated, {failed} failed.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
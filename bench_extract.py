@@ -0,0 +1,58 @@
+"""Benchmark serial vs. process-pool PDF text extraction.
+
+Usage: python bench_extract.py [pages]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate
+
+import pdf_extract
+
+
+def build_sample_pdf(path, pages):
+    """Write a PDF with the given number of text-heavy pages."""
+    styles = getSampleStyleSheet()
+    sentence = "Photosynthesis converts light energy into chemical energy stored in glucose. "
+    story = []
+    for i in range(pages):
+        story.append(Paragraph(f"Chapter {i + 1}", styles['Heading2']))
+        for _ in range(12):
+            story.append(Paragraph(sentence * 4, styles['BodyText']))
+        story.append(PageBreak())
+    SimpleDocTemplate(path, pagesize=letter).build(story)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+        pdf_path = temp_file.name
+    try:
+        build_sample_pdf(pdf_path, pages)
+
+        # Start the pool up front so worker spawn time isn't charged to the first run
+        pdf_extract.get_pool().submit(int).result()
+
+        serial_text, serial_time = timed(pdf_extract.extract_pdf_text, pdf_path, parallel=False)
+        parallel_text, parallel_time = timed(pdf_extract.extract_pdf_text, pdf_path)
+        assert serial_text == parallel_text, "parallel extraction changed the output"
+
+        print(f"pages: {pages}, workers: {pdf_extract.PDF_WORKERS}, chars: {len(serial_text)}")
+        print(f"serial:   {serial_time:.2f}s")
+        print(f"parallel: {parallel_time:.2f}s ({serial_time / parallel_time:.1f}x)")
+    finally:
+        os.remove(pdf_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Measure import time of the entry points, to catch startup regressions.
+
+Each module is imported in a fresh interpreter so nothing is cached between
+runs, with the environment as given (model warm-up included). Also times
+quiz_core.init(), the startup work every entry point runs, and checks that
+the headless core (quiz_core) doesn't load the UI or any of the libraries
+that are only needed once a file is read, a PDF is written or the model is
+called. numpy is reported but allowed: the near-duplicate filter (dedup)
+runs on every request, so it is imported eagerly, and it is the largest
+part of quiz_core's import time (timed on its own as "numpy").
+
+Usage: python bench_startup.py [runs] [--max SECONDS]
+       (exits non-zero if quiz_core's median import time is above SECONDS)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# (label, statements timed in a fresh interpreter)
+ENTRY_POINTS = [
+    ("quiz_core", "import quiz_core"),
+    ("batch", "import batch"),
+    ("api", "import api"),
+    ("app", "import app"),
+    ("init()", "import quiz_core; quiz_core.init()"),
+    ("numpy", "import numpy"),
+]
+# Loaded on first use only; importing any of them at startup is a regression
+LAZY_MODULES = ["gradio", "openai", "httpx", "reportlab", "PyPDF2", "docx"]
+# Imported at startup on purpose (dedup and chunk_index need numpy), but shown so its cost stays visible
+EAGER_MODULES = ["numpy"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{statements}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {tracked!r} if m in sys.modules]}}))
+"""
+
+
+def import_time(statements):
+    """Seconds to run statements in a new interpreter, and which of the tracked modules they pulled in."""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(statements=statements, tracked=LAZY_MODULES + EAGER_MODULES)],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{statements!r} failed:\n{result.stderr}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return report['seconds'], report['loaded']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("runs", nargs="?", type=int, default=5)
+    parser.add_argument("--max", type=float, help="fail if quiz_core takes longer than this to import")
+    args = parser.parse_args()
+
+    failed = False
+    medians = {}
+    for label, statements in ENTRY_POINTS:
+        times = []
+        for _ in range(args.runs):
+            seconds, loaded = import_time(statements)
+            times.append(seconds)
+        medians[label] = statistics.median(times)
+        print(f"{label:10} {medians[label]:.2f}s median  loads: {', '.join(loaded) or '-'}")
+        unexpected = [m for m in loaded if m in LAZY_MODULES]
+        if label == "quiz_core" and unexpected:
+            print(f"quiz_core should not load {', '.join(unexpected)} at import")
+            failed = True
+
+    if args.max is not None and medians["quiz_core"] > args.max:
+        print(f"quiz_core import took {medians['quiz_core']:.2f}s, above --max {args.max:.2f}s")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Measure time-to-first-token (TTFT) against the model backend.
+
+Compares a cold request (model unloaded) with one after warm-up, and the old
+prompt layout (request counts first, then instructions and context) with the
+current static-first layout, whose shared prefix the backend can reuse.
+Needs a running Ollama with MODEL pulled; uses the first of MODEL_BACKENDS.
+
+Usage: python bench_ttft.py [runs]
+"""
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+# Only the prompt builders and the backend pool are used, so quiz_core.init() (and its warm-up) isn't called
+import quiz_core
+
+SAMPLE_TEXT = (
+    "Photosynthesis converts light energy into chemical energy stored in glucose. "
+    "Chlorophyll in the chloroplasts absorbs mostly blue and red light. "
+    "The light-dependent reactions split water and release oxygen, while the Calvin cycle fixes carbon dioxide. "
+) * 40
+COUNTS = [(2, 1, 1), (3, 2, 0), (1, 1, 3), (4, 0, 1), (0, 2, 2)]
+
+
+def first_token_time(backend, messages):
+    """Seconds until the first content chunk of a streamed reply."""
+    start = time.perf_counter()
+    stream = backend.client.chat.completions.create(
+        model=quiz_core.MODEL, messages=messages, stream=True, temperature=quiz_core.TEMPERATURE, max_tokens=32
+    )
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                break
+    finally:
+        stream.close()
+    return time.perf_counter() - start
+
+
+def legacy_messages(prompt_topic, context, question_type, easy, medium, hard, structured=False):
+    """The previous layout: generic system message, then counts, instructions and context in one user message."""
+    message = (
+        f"Generate EXACTLY {easy + medium + hard} {question_type} questions based on {prompt_topic}. "
+        f"You MUST create EXACTLY {easy} Easy questions, {medium} Medium questions, and {hard} Hard questions. "
+        f"{quiz_core.format_prompt(question_type, structured)}"
+        f"\nContext from the document (use this to generate relevant questions):\n{context}\n"
+    )
+    return [{"role": "system", "content": quiz_core.system_message}, {"role": "user", "content": message}]
+
+
+def unload(backend):
+    httpx.post(f"{backend.native_url}/api/generate", json={'model': quiz_core.MODEL, 'keep_alive': 0}, timeout=60).raise_for_status()
+
+
+def layout_ttft(backend, build, runs):
+    """Median TTFT over runs requests that only differ in their counts, as repeat quiz requests do.
+
+    Both layouts get the output format the app uses, so only the order of the prompt differs.
+    """
+    context = quiz_core.token_budget.trim(SAMPLE_TEXT, quiz_core.token_budget.context_tokens)
+    times = []
+    for i in range(runs):
+        easy, medium, hard = COUNTS[i % len(COUNTS)]
+        times.append(first_token_time(backend, build("the uploaded document", context, "MCQ", easy, medium, hard, quiz_core.STRUCTURED_OUTPUT)))
+    return statistics.median(times)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    backend = quiz_core.backend_pool.backends[0]
+    messages = quiz_core.build_messages("the topic 'Photosynthesis'", "", "MCQ", 1, 1, 1, quiz_core.STRUCTURED_OUTPUT)
+
+    unload(backend)
+    cold = first_token_time(backend, messages)
+    unload(backend)
+    quiz_core.backend_pool.warm_up(backend, quiz_core.MODEL, os.getenv("MODEL_KEEP_ALIVE", "30m"))
+    warm = first_token_time(backend, messages)
+
+    # Prime the model once so both layouts are measured warm
+    first_token_time(backend, messages)
+    legacy = layout_ttft(backend, legacy_messages, runs)
+    current = layout_ttft(backend, quiz_core.build_messages, runs)
+
+    print(f"model: {quiz_core.MODEL} on {backend.url}, runs: {runs}")
+    print(f"cold start:    {cold:.2f}s")
+    print(f"after warm-up: {warm:.2f}s ({cold / warm:.1f}x)")
+    print(f"old layout:    {legacy:.2f}s median")
+    print(f"static-first:  {current:.2f}s median ({legacy / current:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import string
+
+import numpy as np
+
+# Byte translation table that zeroes ASCII punctuation and whitespace but keeps
+# letters, digits and UTF-8 multi-byte sequences; much faster than a regex
+_KEEP = set((string.ascii_lowercase + string.digits).encode('ascii'))
+_TOKEN_TABLE = bytes(b if b in _KEEP or b >= 128 else 0 for b in range(256))
+# Odd base of the polynomial token hash, so it has an inverse modulo 2**64
+_HASH_BASE = 0x100000001B3
+_HASH_INVERSE = pow(_HASH_BASE, -1, 2 ** 64)
+# Odd multiplier that spreads the low bits into the high ones, which ChunkIndex keeps when it truncates
+_HASH_MIX = 0x9E3779B97F4A7C15
+_POWER_BLOCK = 1024
+
+
+def _powers(base, count):
+    """base ** i modulo 2**64 for i in range(count), as (high, low) factors: base ** i == high[i // 1024] * low[i % 1024]."""
+    low = np.cumprod(np.full(_POWER_BLOCK - 1, base, dtype=np.uint64))
+    high = np.cumprod(np.full(max(0, -(-count // _POWER_BLOCK) - 1), pow(base, _POWER_BLOCK, 2 ** 64), dtype=np.uint64))
+    one = np.ones(1, dtype=np.uint64)
+    return np.concatenate((one, high)), np.concatenate((one, low))
+
+
+def token_hashes(text):
+    """Start offsets (in the lowercased UTF-8 bytes) and 64-bit hashes of text's word tokens.
+
+    A token hashes to sum(byte[i] * BASE ** i) over its own bytes, so equal
+    tokens get equal hashes wherever they occur. It is computed over the whole
+    text in a few NumPy passes instead of building a Python object per token:
+    every byte is weighted by BASE ** position, each token's weights are
+    summed, and the sum is shifted back by BASE ** -start.
+    """
+    codes = np.frombuffer(text.lower().encode('utf-8').translate(_TOKEN_TABLE), dtype=np.uint8)
+    starts = np.flatnonzero(np.diff(codes != 0, prepend=False, append=False))[0::2]
+    if not len(starts):
+        return starts, np.zeros(0, dtype=np.uint64)
+    high, low = _powers(_HASH_BASE, len(codes))
+    weights = np.multiply.outer(high, low).ravel()[:len(codes)]
+    sums = np.add.reduceat(weights * codes, starts)
+    inverse_high, inverse_low = _powers(_HASH_INVERSE, len(codes))
+    return starts, sums * inverse_high[starts // _POWER_BLOCK] * inverse_low[starts % _POWER_BLOCK] * np.uint64(_HASH_MIX)
+
+
+def split_chunks(text, chunk_chars=600):
+    """Split text into chunks of roughly chunk_chars, breaking on whitespace."""
+    chunks = []
+    start = 0
+    length = len(text)
+    while start < length:
+        end = min(start + chunk_chars, length)
+        if end < length:
+            # Prefer to break at a paragraph, then a line, then a word boundary
+            for sep in ("\n\n", "\n", " "):
+                cut = text.rfind(sep, start + chunk_chars // 2, end)
+                if cut != -1:
+                    end = cut + len(sep)
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        start = end
+    return chunks
+
+
+class ChunkIndex:
+    """BM25 index over document chunks, stored as NumPy posting arrays.
+
+    Postings are kept twice: grouped by term for scoring queries, and grouped
+    by chunk (as L2-normalised TF-IDF rows) for salience and diversity.
+    """
+
+    def __init__(self, chunks, k1=1.2, b=0.75):
+        self.chunks = chunks
+        n_chunks = len(chunks)
+        # Tokenize the whole document in one pass and map each token back to its chunk by byte offset
+        token_starts, hashes = token_hashes(" ".join(chunks))
+        chunk_starts = np.cumsum([0] + [len(chunk.lower().encode('utf-8')) + 1 for chunk in chunks[:-1]])
+        doc_of_token = np.searchsorted(chunk_starts, token_starts, side='right') - 1
+        lengths = np.bincount(doc_of_token, minlength=n_chunks)
+
+        # One sort groups the tokens into (term, chunk) postings: each key is the token's
+        # hash with its chunk number in the low doc_bits, so equal keys are one posting
+        self.doc_bits = max(1, (n_chunks - 1).bit_length())
+        keys = (hashes >> np.uint64(self.doc_bits) << np.uint64(self.doc_bits)) | doc_of_token.astype(np.uint64)
+        keys.sort()
+        posting_starts = np.flatnonzero(np.diff(keys, prepend=~keys[:1]))
+        tf = np.diff(posting_starts, append=len(keys))
+        posting_keys = keys[posting_starts]
+        docs = (posting_keys & np.uint64((1 << self.doc_bits) - 1)).astype(np.int64)
+        term_keys = posting_keys >> np.uint64(self.doc_bits)
+        is_new_term = np.diff(term_keys, prepend=~term_keys[:1]) != 0
+        terms = np.cumsum(is_new_term) - 1
+        # The vocabulary is the sorted array of (truncated) term hashes rather than a dict of every token
+        self.term_hashes = term_keys[is_new_term]
+
+        n_terms = max(len(self.term_hashes), 1)
+        df = np.bincount(terms, minlength=n_terms)
+        idf = np.log1p((n_chunks - df + 0.5) / (df + 0.5))
+        avg_len = lengths.mean() if n_chunks else 0.0
+        norm = k1 * (1 - b + b * lengths[docs] / max(avg_len, 1.0))
+        bm25 = idf[terms] * tf * (k1 + 1) / (tf + norm)
+
+        # Term-major postings for query scoring, in key order already
+        self.post_docs = docs
+        self.post_weights = bm25
+        self.term_ptr = np.concatenate(([0], np.cumsum(df)))
+
+        # Chunk-major TF-IDF rows; a stable sort on the small chunk numbers is a cheap radix sort
+        order = np.argsort(docs.astype(np.uint16) if n_chunks <= 1 << 16 else docs, kind='stable')
+        docs, terms, tf = docs[order], terms[order], tf[order]
+        tfidf = tf * idf[terms]
+        row_norms = np.sqrt(np.bincount(docs, weights=tfidf ** 2, minlength=n_chunks))
+        self.row_docs = docs
+        self.row_terms = terms
+        self.row_values = tfidf / np.maximum(row_norms[docs], 1e-12)
+        self.row_ptr = np.concatenate(([0], np.cumsum(np.bincount(docs, minlength=n_chunks))))
+        self.n_terms = n_terms
+
+    @classmethod
+    def from_text(cls, text, chunk_chars=600):
+        return cls(split_chunks(text, chunk_chars))
+
+    @property
+    def total_chars(self):
+        return sum(map(len, self.chunks))
+
+    def section_contexts(self, sections, budget):
+        """Split the document into contiguous sections and return a coverage context for each."""
+        ids = np.arange(len(self.chunks))
+        return [
+            "\n\n".join(self.chunks[i] for i in sorted(self._select_coverage(budget, section)))[:budget]
+            for section in np.array_split(ids, min(sections, len(self.chunks)))
+        ]
+
+    def score(self, query):
+        """BM25 score of every chunk for the query."""
+        scores = np.zeros(len(self.chunks))
+        for term_hash in set(token_hashes(query)[1].tolist()):
+            term_id = self._term_id(term_hash)
+            if term_id is None:
+                continue
+            start, end = self.term_ptr[term_id], self.term_ptr[term_id + 1]
+            scores += np.bincount(self.post_docs[start:end], weights=self.post_weights[start:end], minlength=len(self.chunks))
+        return scores
+
+    def _term_id(self, term_hash):
+        term_hash >>= self.doc_bits
+        term_id = int(np.searchsorted(self.term_hashes, term_hash))
+        if term_id < len(self.term_hashes) and self.term_hashes[term_id] == term_hash:
+            return term_id
+        return None
+
+    def salience(self):
+        """Similarity of every chunk to the document centroid, for untargeted selection."""
+        centroid = np.bincount(self.row_terms, weights=self.row_values, minlength=self.n_terms)
+        return np.bincount(self.row_docs, weights=self.row_values * centroid[self.row_terms], minlength=len(self.chunks))
+
+    def _dense_rows(self, ids):
+        columns = np.unique(np.concatenate([self.row_terms[self.row_ptr[i]:self.row_ptr[i + 1]] for i in ids]))
+        dense = np.zeros((len(ids), len(columns)))
+        for row, i in enumerate(ids):
+            start, end = self.row_ptr[i], self.row_ptr[i + 1]
+            dense[row, np.searchsorted(columns, self.row_terms[start:end])] = self.row_values[start:end]
+        return dense
+
+    def select(self, budget, query="", candidates=64, diversity=0.3):
+        """Pick chunks that fit in budget characters, returned in document order.
+
+        With a query, chunks are ranked by BM25 and picked with maximal marginal
+        relevance so near-identical passages aren't sent twice. Without a usable
+        query, the document is cut into equal sections and the most central
+        chunk of each is taken, so the context covers the whole document.
+        """
+        if not self.chunks:
+            return ""
+        scores = self.score(query) if query else np.zeros(len(self.chunks))
+        if scores.any():
+            chosen = self._select_relevant(scores, budget, candidates, diversity)
+        else:
+            chosen = self._select_coverage(budget)
+        return "\n\n".join(self.chunks[i] for i in sorted(chosen))[:budget]
+
+    def _select_relevant(self, scores, budget, candidates, diversity):
+        pool = np.argsort(-scores, kind='stable')[:candidates]
+        relevance = scores[pool] / max(scores[pool].max(), 1e-12)
+        vectors = self._dense_rows(pool)
+        similarity = vectors @ vectors.T
+
+        chosen = []
+        used = 0
+        max_sim = np.zeros(len(pool))
+        available = np.ones(len(pool), dtype=bool)
+        while available.any():
+            mmr = np.where(available, (1 - diversity) * relevance - diversity * max_sim, -np.inf)
+            best = int(np.argmax(mmr))
+            available[best] = False
+            size = len(self.chunks[pool[best]])
+            if used + size > budget and chosen:
+                continue
+            chosen.append(int(pool[best]))
+            used += size
+            max_sim = np.maximum(max_sim, similarity[best])
+            if used >= budget:
+                break
+        return chosen
+
+    def _select_coverage(self, budget, ids=None):
+        if ids is None:
+            ids = np.arange(len(self.chunks))
+        salience = self.salience()
+        avg_chars = sum(len(self.chunks[i]) for i in ids) / len(ids)
+        sections = max(1, min(len(ids), int(budget // max(avg_chars, 1))))
+        chosen = []
+        used = 0
+        for section in np.array_split(ids, sections):
+            best = int(section[np.argmax(salience[section])])
+            if used + len(self.chunks[best]) > budget and chosen:
+                continue
+            chosen.append(best)
+            used += len(self.chunks[best])
+        return chosen
@@ -0,0 +1,90 @@
+import re
+import threading
+import zlib
+
+import numpy as np
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def _normalise(text):
+    return _NON_WORD.sub(' ', str(text).lower()).strip()
+
+
+def question_signature_text(question):
+    """Normalised question text, used for similarity.
+
+    Options are left out: MCQs on one subject often share all four, which
+    would make different questions look alike.
+    """
+    return _normalise(question.get('text', ''))
+
+
+def answer_text(question):
+    """Normalised answer, resolved to the option it names for MCQs."""
+    answer = str(question.get('answer', '')).strip()
+    options = question.get('options') or []
+    if len(answer) == 1 and answer.upper() in "ABCD" and ord(answer.upper()) - 65 < len(options):
+        answer = options[ord(answer.upper()) - 65]
+    return _normalise(answer)
+
+
+class NearDuplicateFilter:
+    """Drop near-duplicate questions with MinHash signatures and LSH banding.
+
+    Each question's text is reduced to character shingles, hashed into a
+    num_perm MinHash signature and bucketed by bands of that signature, so
+    checking a new question only compares it against the few items sharing a
+    band. A question is a duplicate when its estimated similarity reaches
+    threshold and its answer is the same, so a question that only flips a
+    detail (and with it the answer) is kept.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=64, bands=16, shingle_size=4, seed=1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, _MAX_HASH, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _MAX_HASH, num_perm, dtype=np.uint64)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.buckets = {}
+        self.signatures = []
+        self.answers = []
+        self.lock = threading.Lock()
+        self.dropped = 0
+
+    def signature(self, text):
+        """MinHash signature of the text's character shingles."""
+        k = self.shingle_size
+        shingles = {text[i:i + k] for i in range(max(1, len(text) - k + 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+        permuted = (np.outer(hashes, self.a) + self.b) % _PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def add(self, question):
+        """Record the question and return True, or return False if it nearly duplicates one already seen."""
+        signature = self.signature(question_signature_text(question))
+        answer = answer_text(question)
+        keys = self._band_keys(signature)
+        with self.lock:
+            candidates = {i for key in keys for i in self.buckets.get(key, ())}
+            for i in candidates:
+                if self.answers[i] == answer and np.mean(self.signatures[i] == signature) >= self.threshold:
+                    self.dropped += 1
+                    return False
+            index = len(self.signatures)
+            self.signatures.append(signature)
+            self.answers.append(answer)
+            for key in keys:
+                self.buckets.setdefault(key, []).append(index)
+            return True
+
+    def filter(self, questions):
+        """Return the questions that are not near-duplicates, in order."""
+        return [q for q in questions if self.add(q)]
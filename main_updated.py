@@ -1,20 +1,24 @@
 import gradio as gr
-from openai import OpenAI
 import os
 from dotenv import load_dotenv
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
 import tempfile
 
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client
+# OpenAI client, created on first use so openai isn't imported at startup
 MODEL = "llama3.2"
-openai = OpenAI(base_url="http://localhost:11434/v1", api_key="ollama")
+_client = None
 system_message = "You are a helpful assistant"
 
+def get_client():
+    """Return the OpenAI client, creating it on the first request."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(base_url="http://localhost:11434/v1", api_key="ollama")
+    return _client
+
 def generate_quiz(topic, total_questions, easy_questions, medium_questions, hard_questions):
     try:
         # Convert inputs to integers
@@ -46,7 +50,7 @@ def generate_quiz(topic, total_questions, easy_questions, medium_questions, hard
         ]
 
         # Call the model
-        stream = openai.chat.completions.create(
+        stream = get_client().chat.completions.create(
             model=MODEL,
             messages=messages,
             stream=True
@@ -107,6 +111,10 @@ def generate_quiz(topic, total_questions, easy_questions, medium_questions, hard
         return f"Error: An unexpected error occurred: {str(e)}", None
 
 def create_pdf(topic, easy_questions, medium_questions, hard_questions):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+
     # Create a temporary file for the PDF
     with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
         pdf_path = temp_file.name
@@ -0,0 +1,72 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds for stage latencies, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Model calls take far longer than local work
+MODEL_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+class Histogram:
+    """Cumulative histogram of observed values, in the shape Prometheus expects.
+
+    observe() only bisects and bumps one bucket under a lock, so it is cheap
+    enough for the request path; bucket counts are accumulated when rendered.
+    """
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.lock = threading.Lock()
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe the seconds spent in the block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def render(self):
+        """Prometheus text exposition lines for this histogram."""
+        with self.lock:
+            counts = list(self.counts)
+            total = self.sum
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound:g}"}} {cumulative}')
+        cumulative += counts[-1]
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f"{self.name}_sum {total:g}")
+        lines.append(f"{self.name}_count {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """A set of histograms rendered together for a metrics endpoint."""
+
+    def __init__(self):
+        self.histograms = []
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        histogram = Histogram(name, help, buckets)
+        self.histograms.append(histogram)
+        return histogram
+
+    def render(self):
+        """Every histogram in the Prometheus text format (version 0.0.4)."""
+        return "\n".join(line for histogram in self.histograms for line in histogram.render()) + "\n"
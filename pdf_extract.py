@@ -0,0 +1,103 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Documents shorter than this are extracted serially; the pool isn't worth it
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the shared extraction process pool, starting it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+        return _pool
+
+
+def extract_page_range(file_path, start, end):
+    """Extract the text of pages [start, end) in a worker process."""
+    import PyPDF2
+
+    with open(file_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def page_shards(page_count, workers):
+    """Split page indices into contiguous ranges, a few per worker so stragglers even out."""
+    shard_size = max(1, -(-page_count // (workers * 4)))
+    return [(start, min(start + shard_size, page_count)) for start in range(0, page_count, shard_size)]
+
+
+def extract_pdf_text(file_path, parallel=True):
+    """Extract the text of every page of a PDF, fanning large documents out across processes.
+
+    Shards are joined in page order with a single join.
+    """
+    import PyPDF2
+
+    with open(file_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        page_count = len(reader.pages)
+        if not parallel or PDF_WORKERS < 2 or page_count < PARALLEL_MIN_PAGES:
+            return "".join(page.extract_text() or "" for page in reader.pages)
+
+    shards = page_shards(page_count, PDF_WORKERS)
+    results = get_pool().map(
+        extract_page_range,
+        [file_path] * len(shards),
+        [start for start, _ in shards],
+        [end for _, end in shards]
+    )
+    return "".join(text for shard in results for text in shard)
+
+
+def parse_page_range(spec):
+    """Parse a 1-based page selection like "1-20, 35" into sorted, merged 0-based (start, end) ranges.
+
+    Ranges are kept as bounds rather than expanded, so a huge selection costs
+    nothing until it is clamped to the document in iter_pdf_pages. Returns
+    None for an empty selection (meaning every page). Raises ValueError on
+    malformed input.
+    """
+    if not spec or not spec.strip():
+        return None
+    ranges = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = (int(bound) for bound in part.split('-', 1))
+        else:
+            start = end = int(part)
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid page range '{part}'.")
+        ranges.append((start - 1, end))
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged or None
+
+
+def iter_pdf_pages(file_path, pages=None):
+    """Yield the text of the selected pages (every page by default), parsing each only when requested.
+
+    pages is a list of 0-based (start, end) ranges from parse_page_range.
+    """
+    import PyPDF2
+
+    with open(file_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        page_count = len(reader.pages)
+        ranges = [(0, page_count)] if pages is None else pages
+        for i in (i for start, end in ranges for i in range(start, min(end, page_count))):
+            yield reader.pages[i].extract_text() or ""
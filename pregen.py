@@ -0,0 +1,156 @@
+import json
+import logging
+import math
+import threading
+import time
+
+from question_bank import make_source
+
+log = logging.getLogger("quiz.pregen")
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+
+class Activity:
+    """Track live quiz requests so background work can wait for idle periods."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.last_active = time.monotonic()
+
+    def __enter__(self):
+        with self.lock:
+            self.active += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.active -= 1
+            self.last_active = time.monotonic()
+
+    def idle_for(self):
+        """Seconds since the last live request finished, or 0 while one is running."""
+        with self.lock:
+            return 0.0 if self.active else time.monotonic() - self.last_active
+
+    def busy(self):
+        """Whether a live request is running right now."""
+        with self.lock:
+            return self.active > 0
+
+
+def load_targets(path):
+    """Load explicit stock targets from a JSON list of {topic, question_type, easy, medium, hard}."""
+    if not path:
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class PregenWorker(threading.Thread):
+    """Background thread that keeps the question bank stocked for popular topics.
+
+    Stock targets come from explicit configuration plus the most requested
+    topic/type pairs in the request history (enough questions for `depth`
+    more requests of the average size). Work only starts after the app has
+    been idle for idle_seconds and is done in small batches, re-checking for
+    live requests between batches so it never competes with them for the
+    model backend.
+
+    generate(topic, question_type, difficulty, count) must return a list of
+    validated question dicts.
+    """
+
+    def __init__(self, bank, generate, activity, targets=None, depth=5, history_window=7 * 24 * 3600,
+                 popular_limit=10, idle_seconds=30, batch_size=5, poll_interval=5):
+        super().__init__(daemon=True, name="pregen-worker")
+        self.bank = bank
+        self.generate = generate
+        self.activity = activity
+        self.targets = targets or []
+        self.depth = depth
+        self.history_window = history_window
+        self.popular_limit = popular_limit
+        self.idle_seconds = idle_seconds
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.stop_event = threading.Event()
+        self.generated = 0
+        self.failures = 0
+
+    def stop(self):
+        self.stop_event.set()
+
+    def plan(self):
+        """Return the stock target for every tracked (topic, type, difficulty) with current stock and demand."""
+        plan = {}
+        for target in self.targets:
+            for difficulty in DIFFICULTIES:
+                if target.get(difficulty):
+                    source = make_source(target['topic'])
+                    plan[(source, target['question_type'], difficulty)] = {
+                        'topic': target['topic'], 'target': target[difficulty], 'per_request': None
+                    }
+        for entry in self.bank.popular(time.time() - self.history_window, self.popular_limit):
+            # Uploaded documents can't be regenerated without the file, so only topics are stocked
+            if not entry['source'].startswith('topic:') or not entry['topic']:
+                continue
+            for difficulty in DIFFICULTIES:
+                per_request = entry['per_request'][difficulty]
+                key = (entry['source'], entry['question_type'], difficulty)
+                if key in plan:
+                    plan[key]['per_request'] = per_request
+                elif per_request:
+                    plan[key] = {
+                        'topic': entry['topic'], 'target': math.ceil(per_request * self.depth), 'per_request': per_request
+                    }
+
+        for (source, question_type, difficulty), item in plan.items():
+            item['stock'] = self.bank.available(source, question_type, difficulty)
+        return plan
+
+    def next_job(self):
+        """Pick the tracked item furthest below its target, as (topic, type, difficulty, count)."""
+        best = None
+        for (source, question_type, difficulty), item in self.plan().items():
+            missing = item['target'] - item['stock']
+            if missing <= 0:
+                continue
+            shortfall = missing / item['target']
+            if best is None or shortfall > best[0]:
+                best = (shortfall, (item['topic'], question_type, difficulty, min(missing, self.batch_size)))
+        return best[1] if best else None
+
+    def run(self):
+        while not self.stop_event.wait(self.poll_interval):
+            if self.activity.idle_for() < self.idle_seconds:
+                continue
+            try:
+                job = self.next_job()
+                if job is None:
+                    continue
+                topic, question_type, difficulty, count = job
+                questions = self.generate(topic, question_type, difficulty, count)
+                self.bank.add(make_source(topic), question_type, questions)
+                self.generated += len(questions)
+                if not questions:
+                    self.failures += 1
+            except Exception as e:
+                self.failures += 1
+                log.exception(f"Background generation failed: {str(e)}")
+
+    def stats(self):
+        """Per-item stock versus target, and how many average-sized requests the stock covers."""
+        items = []
+        for (source, question_type, difficulty), item in self.plan().items():
+            per_request = item['per_request']
+            items.append({
+                'topic': item['topic'],
+                'question_type': question_type,
+                'difficulty': difficulty,
+                'stock': item['stock'],
+                'target': item['target'],
+                'requests_ahead': item['stock'] / per_request if per_request else None,
+            })
+        return {'running': self.is_alive(), 'generated': self.generated, 'failures': self.failures, 'items': items}
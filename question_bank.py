@@ -0,0 +1,165 @@
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    question_type TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    text_key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_served REAL,
+    served_count INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (source, question_type, text_key)
+);
+CREATE INDEX IF NOT EXISTS questions_lookup
+    ON questions (source, question_type, difficulty, last_served);
+CREATE TABLE IF NOT EXISTS requests (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    topic TEXT,
+    question_type TEXT NOT NULL,
+    easy INTEGER NOT NULL,
+    medium INTEGER NOT NULL,
+    hard INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS requests_created ON requests (created);
+"""
+
+
+def make_source(topic=None, file_hash=None, pages=None):
+    """Normalised bank key for a request: the document hash (plus page selection) or the topic."""
+    if file_hash:
+        selection = ",".join(f"{start + 1}-{end}" if end > start + 1 else str(end) for start, end in pages or ())
+        return f"file:{file_hash}" + (f":{selection}" if selection else "")
+    return "topic:" + re.sub(r"\s+", " ", (topic or "").strip().lower())
+
+
+class QuestionBank:
+    """SQLite store of validated questions, indexed by (source, question type, difficulty).
+
+    Questions are sampled at random from those not served within the last
+    cooldown seconds, so repeat requests don't keep getting the same quiz.
+    """
+
+    def __init__(self, db_path, cooldown=24 * 3600):
+        self.db_path = db_path
+        self.cooldown = cooldown
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps the bank safe to use from any thread
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, source, question_type, questions, served=False):
+        """Store validated questions, ignoring ones already banked for this source and type.
+
+        Pass served=True for questions that were just handed to a user, so the cooldown applies to them too.
+        """
+        now = time.time()
+        rows = [
+            (source, question_type, q['difficulty'], q['text'].strip().lower(), json.dumps(q), now, now if served else None, int(served))
+            for q in questions
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO questions (source, question_type, difficulty, text_key, data, created, last_served, served_count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def take(self, source, question_type, difficulty, count):
+        """Sample up to count banked questions not served within the cooldown, and mark them served."""
+        if count <= 0:
+            return []
+        now = time.time()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, data FROM questions WHERE source = ? AND question_type = ? AND difficulty = ? "
+                "AND (last_served IS NULL OR last_served <= ?) ORDER BY RANDOM() LIMIT ?",
+                (source, question_type, difficulty, now - self.cooldown, count)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE questions SET last_served = ?, served_count = served_count + 1 WHERE id = ?",
+                [(now, row[0]) for row in rows]
+            )
+        return [json.loads(row[1]) for row in rows]
+
+    def release(self, source, question_type, questions):
+        """Undo take() for questions that never reached the user, so the cooldown doesn't hold them back."""
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE questions SET last_served = NULL, served_count = MAX(served_count - 1, 0) "
+                "WHERE source = ? AND question_type = ? AND text_key = ?",
+                [(source, question_type, q['text'].strip().lower()) for q in questions]
+            )
+
+    def questions(self, source, question_type):
+        """Every banked question for a source and type, served or not."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT data FROM questions WHERE source = ? AND question_type = ?",
+                (source, question_type)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self, source, question_type, difficulty):
+        """Number of banked questions for a source, type and difficulty."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM questions WHERE source = ? AND question_type = ? AND difficulty = ?",
+                (source, question_type, difficulty)
+            ).fetchone()[0]
+
+    def available(self, source, question_type, difficulty):
+        """Number of banked questions not served within the cooldown window."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM questions WHERE source = ? AND question_type = ? AND difficulty = ? "
+                "AND (last_served IS NULL OR last_served <= ?)",
+                (source, question_type, difficulty, time.time() - self.cooldown)
+            ).fetchone()[0]
+
+    def record_request(self, source, topic, question_type, easy, medium, hard):
+        """Log a quiz request so popular topics can be pre-generated."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO requests (source, topic, question_type, easy, medium, hard, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (source, topic, question_type, easy, medium, hard, time.time())
+            )
+
+    def popular(self, since, limit=10):
+        """Most requested (source, type) pairs since a timestamp, with average counts per request."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT source, MAX(topic), question_type, COUNT(*), AVG(easy), AVG(medium), AVG(hard) "
+                "FROM requests WHERE created >= ? GROUP BY source, question_type "
+                "ORDER BY COUNT(*) DESC LIMIT ?",
+                (since, limit)
+            ).fetchall()
+        return [
+            {
+                'source': source, 'topic': topic, 'question_type': question_type, 'requests': requests,
+                'per_request': {'easy': easy, 'medium': medium, 'hard': hard}
+            }
+            for source, topic, question_type, requests, easy, medium, hard in rows
+        ]
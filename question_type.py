@@ -1,24 +1,30 @@
 import gradio as gr
-from openai import OpenAI
 import os
 from dotenv import load_dotenv
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
 import tempfile
-import PyPDF2
-from docx import Document
-from openai import OpenAIError
 import time
 
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client
+# OpenAI client, created on first use so openai isn't imported at startup
 MODEL = "llama3.2"
-openai = OpenAI(base_url="http://localhost:11434/v1", api_key="ollama")
+_client = None
 system_message = "You are a helpful assistant"
 
+def get_client():
+    """Return the OpenAI client, creating it on the first request."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(base_url="http://localhost:11434/v1", api_key="ollama")
+    return _client
+
+def api_error():
+    """Base class of every openai client error."""
+    from openai import OpenAIError
+    return OpenAIError
+
 def extract_text_from_file(file):
     """Extract text from uploaded file (PDF, TXT, or DOCX)."""
     if file is None:
@@ -29,6 +35,8 @@ def extract_text_from_file(file):
     
     try:
         if file_ext == '.pdf':
+            import PyPDF2
+
             with open(file_path, 'rb') as f:
                 reader = PyPDF2.PdfReader(f)
                 text = ""
@@ -41,6 +49,7 @@ def extract_text_from_file(file):
             with open(file_path, 'r', encoding='utf-8') as f:
                 return f.read()
         elif file_ext == '.docx':
+            from docx import Document
             doc = Document(file_path)
             text = ""
             for para in doc.paragraphs:
@@ -186,7 +195,7 @@ def generate_quiz(file, topic, total_questions, easy_questions, medium_questions
         for attempt in range(1, max_retries + 1):
             try:
                 print(f"Attempt {attempt} to generate questions...")
-                stream = openai.chat.completions.create(
+                stream = get_client().chat.completions.create(
                     model=MODEL,
                     messages=messages,
                     stream=True,
@@ -259,7 +268,7 @@ def generate_quiz(file, topic, total_questions, easy_questions, medium_questions
                     )
                     if attempt < max_retries:
                         time.sleep(2)
-            except OpenAIError as e:
+            except api_error() as e:
                 print(f"Attempt {attempt} failed: Model request error: {str(e)}")
                 if attempt < max_retries:
                     time.sleep(2)
@@ -332,6 +341,10 @@ def generate_quiz(file, topic, total_questions, easy_questions, medium_questions
 
 def create_pdf(topic, easy_questions, medium_questions, hard_questions, question_type):
     """Create a PDF file with the quiz content."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+
     with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
         pdf_path = temp_file.name
 
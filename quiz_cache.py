@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+
+def hash_file(file_path):
+    """Return the SHA-256 hex digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_key(*parts):
+    """Build a content-addressed cache key from the request parts."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class QuizCache:
+    """Two-tier cache of generated quizzes: an in-memory LRU backed by a directory on disk.
+
+    Each entry stores the rendered markdown, the structured quiz and a copy of
+    the PDF, so cached results survive restarts and temp-file cleanup. The
+    disk tier holds at most max_disk_entries quizzes; every put sweeps out
+    expired entries and then the least recently used ones.
+    """
+
+    def __init__(self, cache_dir, max_entries=128, ttl=7 * 24 * 3600, max_disk_entries=1024):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached (markdown, pdf_path, quiz) for key, or None on a miss."""
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is None:
+                entry = self._load(key)
+            if entry is None or self._expired(entry['created']) or not os.path.exists(entry['pdf_path']):
+                self.memory.pop(key, None)
+                self.misses += 1
+                return None
+            # Touch the entry so the disk sweep sees it as recently used
+            meta_path, _ = self._paths(key)
+            if os.path.exists(meta_path):
+                os.utime(meta_path)
+            self._remember(key, entry)
+            self.hits += 1
+            return entry['markdown'], entry['pdf_path'], entry['quiz']
+
+    def _load(self, key):
+        meta_path, pdf_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(meta['created']):
+            for path in (meta_path, pdf_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            return None
+        return {'markdown': meta['markdown'], 'pdf_path': pdf_path, 'quiz': meta.get('quiz'), 'created': meta['created']}
+
+    def put(self, key, markdown, pdf_path, quiz=None):
+        """Store a generated quiz, copying its PDF into the cache directory."""
+        meta_path, cached_pdf = self._paths(key)
+        entry = {'markdown': markdown, 'pdf_path': cached_pdf, 'quiz': quiz, 'created': time.time()}
+        with self.lock:
+            shutil.copyfile(pdf_path, cached_pdf)
+            # Write to a temp file first so a crash never leaves a half-written entry
+            tmp_path = meta_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'markdown': markdown, 'quiz': quiz, 'created': entry['created']}, f)
+            os.replace(tmp_path, meta_path)
+            self._remember(key, entry)
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json'):
+                entries.append((os.stat(os.path.join(self.cache_dir, name)).st_mtime, name[:-len('.json')]))
+        entries.sort()
+        # A write marks an entry as used, so anything untouched for longer than the TTL has expired
+        expired = [key for mtime, key in entries if self._expired(mtime)]
+        keep = [key for mtime, key in entries if not self._expired(mtime)]
+        for key in expired + keep[:max(0, len(keep) - self.max_disk_entries)]:
+            for path in self._paths(key):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.memory.pop(key, None)
+
+    def stats(self):
+        """Return hit/miss counters and the in-memory tier size."""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'memory_entries': len(self.memory),
+            }
+
+
+class TextCache:
+    """Disk cache of text extracted from uploaded documents, keyed by file hash.
+
+    The directory is bounded by max_bytes; least recently used entries are
+    evicted first.
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, file_hash):
+        return os.path.join(self.cache_dir, f"{file_hash}.txt")
+
+    def get(self, file_hash):
+        """Return the cached text for a file hash, or None on a miss."""
+        path = self._path(file_hash)
+        with self.lock:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    text = f.read()
+            except OSError:
+                self.misses += 1
+                return None
+            # Touch the entry so eviction sees it as recently used
+            os.utime(path)
+            self.hits += 1
+            return text
+
+    def put(self, file_hash, text):
+        """Store extracted text and evict old entries beyond max_bytes."""
+        path = self._path(file_hash)
+        with self.lock:
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.txt'):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total += stat.st_size
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+    def stats(self):
+        """Return hit/miss counters."""
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses}
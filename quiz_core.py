@@ -0,0 +1,1186 @@
+"""Quiz generation pipeline without the Gradio UI.
+
+app.py builds the web interface on top of this module; batch.py and api.py
+import it directly, so they start without loading gradio. Heavy libraries
+(reportlab, python-docx, PyPDF2, openai) are imported on first use, and
+nothing is written or started until init() is called.
+"""
+import os
+import logging
+from dotenv import load_dotenv
+import tempfile
+import json
+import math
+import time
+import queue
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from admission import AdmissionGate, BackendBusy
+from backends import BackendPool, api_error, node_errors, parse_backends
+from chunk_index import ChunkIndex
+from dedup import NearDuplicateFilter
+from question_bank import QuestionBank, make_source
+from pregen import Activity, PregenWorker, load_targets
+from resilience import CircuitBreaker, CircuitOpen, RetryPolicy, time_left
+from token_budget import TokenBudget, estimate_tokens
+from structured_output import JsonQuestionStreamParser, response_format
+from pdf_extract import extract_pdf_text, iter_pdf_pages, parse_page_range
+from quiz_cache import QuizCache, TextCache, hash_file, make_key
+from singleflight import SingleFlight
+from metrics import MODEL_BUCKETS, MetricsRegistry
+from structured_log import ResponseSampler, in_context, in_request, new_request_id, request_context, setup_logging
+
+# Load environment variables
+load_dotenv()
+
+log = logging.getLogger("quiz.core")
+# Raw model replies are only logged as LOG_RAW_RESPONSES allows
+response_sampler = ResponseSampler(os.getenv("LOG_RAW_RESPONSES", "failure"))
+
+# OpenAI-compatible backends (comma-separated MODEL_BACKENDS), picked per call by least outstanding requests
+MODEL = os.getenv("MODEL", "llama3.2")
+backend_pool = BackendPool(
+    parse_backends(os.getenv("MODEL_BACKENDS"), "http://localhost:11434/v1"),
+    api_key=os.getenv("OPENAI_API_KEY", "ollama"),
+    max_failures=int(os.getenv("BACKEND_MAX_FAILURES", "3")),
+    eject_seconds=float(os.getenv("BACKEND_EJECT_SECONDS", "30")),
+    health_interval=float(os.getenv("BACKEND_HEALTH_INTERVAL", "10"))
+)
+system_message = "You are a helpful assistant"
+TEMPERATURE = 0.3
+# Token budgets: the model's context window, document context per prompt and the cap on max_tokens
+token_budget = TokenBudget(
+    context_window=int(os.getenv("MODEL_CONTEXT_WINDOW", "4096")),
+    context_tokens=int(os.getenv("CONTEXT_TOKENS", "1000")),
+    max_output_tokens=int(os.getenv("MAX_OUTPUT_TOKENS", "4000"))
+)
+# Document characters extracted per prompt, generous enough for build_messages to fill the token budget
+CONTEXT_CHARS = token_budget.context_tokens * 5
+# Bump whenever the prompt or parser changes so cached quizzes are regenerated
+PROMPT_VERSION = 4
+# Question types the prompts, parsers and fallback questions support
+QUESTION_TYPES = ("Fill in the Blank", "True/False", "MCQ", "Subjective")
+# Ask the backend for schema-constrained JSON (OUTPUT_FORMAT=json) or the line-based text format
+STRUCTURED_OUTPUT = os.getenv("OUTPUT_FORMAT", "json").lower() == "json"
+
+# On-disk stores, opened by init(): generated quizzes keyed on the request contents, text extracted
+# from uploaded documents keyed on the file bytes, and validated questions kept for reuse
+quiz_cache = None
+text_cache = None
+question_bank = None
+# Keeps the question bank stocked for popular topics while the app is idle; created by init()
+pregen_worker = None
+_init_lock = threading.Lock()
+_initialized = False
+
+# Live generate_quiz calls, so background pre-generation only runs while the app is idle
+live_activity = Activity()
+
+# Quiz generations in progress, keyed like quiz_cache plus the regenerate and use_bank flags, so identical concurrent requests share one
+quiz_flights = SingleFlight()
+
+# Bound concurrent model calls and the queue waiting for them; excess calls fail fast with BackendBusy
+model_gate = AdmissionGate(
+    max_concurrent=int(os.getenv("MODEL_CONCURRENCY", str(4 * len(backend_pool.backends)))),
+    max_waiting=int(os.getenv("MODEL_QUEUE_SIZE", "16")),
+    max_wait=float(os.getenv("MODEL_QUEUE_TIMEOUT", "30"))
+)
+
+# Backoff between failed model requests, and the time budget for generating one quiz
+retry_policy = RetryPolicy(
+    base=float(os.getenv("RETRY_BASE_DELAY", "0.5")),
+    max_delay=float(os.getenv("RETRY_MAX_DELAY", "8"))
+)
+QUIZ_DEADLINE = float(os.getenv("QUIZ_DEADLINE", "120"))
+# Background pre-generation gets a much shorter budget, so it yields the backend quickly
+PREGEN_DEADLINE = float(os.getenv("PREGEN_DEADLINE", "30"))
+
+# Fail fast to the bank and fallback questions while the model backend is down
+model_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+)
+
+# Per-stage histograms, served in the Prometheus text format by api.py's /metrics
+metrics = MetricsRegistry()
+extract_seconds = metrics.histogram("quiz_file_extract_seconds", "Time to extract the context of an uploaded file.")
+prompt_token_count = metrics.histogram("quiz_prompt_tokens", "Estimated tokens in each model prompt.", (250, 500, 1000, 2000, 4000, 8000))
+ttft_seconds = metrics.histogram("quiz_model_ttft_seconds", "Time from sending a model request to its first content chunk.", MODEL_BUCKETS)
+tokens_per_second = metrics.histogram("quiz_model_tokens_per_second", "Streamed reply tokens per second after the first one.", (1, 2, 5, 10, 20, 40, 80, 160))
+stream_seconds = metrics.histogram("quiz_model_stream_seconds", "Total time of each streamed model request.", MODEL_BUCKETS)
+parse_seconds = metrics.histogram("quiz_parse_seconds", "Time spent parsing questions out of each model reply.")
+retry_count = metrics.histogram("quiz_retries", "Model requests beyond the first needed to fill a set of quotas.", (0, 1, 2, 3, 4, 6))
+fallback_count = metrics.histogram("quiz_fallback_questions", "Placeholder questions added to each quiz.", (0, 1, 2, 5, 10, 20))
+render_seconds = metrics.histogram("quiz_markdown_render_seconds", "Time to render a quiz as markdown.")
+pdf_seconds = metrics.histogram("quiz_pdf_build_seconds", "Time to build a quiz PDF.")
+quiz_seconds = metrics.histogram("quiz_build_seconds", "Total time to generate an uncached quiz.", MODEL_BUCKETS)
+
+# Chunk indexes of recently uploaded documents, reused across requests for the same file
+MAX_CHUNK_INDEXES = 8
+
+# Map-reduce generation: roughly one section per SECTION_CHARS of text, capped at MAX_SECTIONS
+SECTION_CHARS = 8000
+MAX_SECTIONS = 8
+MAP_WORKERS = 4
+chunk_indexes = OrderedDict()
+chunk_indexes_lock = threading.Lock()
+
+def extract_text_from_file(file, file_hash=None):
+    """Extract text from uploaded file (PDF, TXT, or DOCX), reusing cached text for files seen before."""
+    if file is None:
+        return ""
+
+    file_hash = file_hash or hash_file(file.name)
+    text = text_cache.get(file_hash)
+    if text is not None:
+        return text
+
+    text = parse_file(file.name)
+    if not text.startswith("<span"):
+        text_cache.put(file_hash, text)
+    return text
+
+def parse_file(file_path):
+    """Parse the text out of a PDF, TXT, or DOCX file."""
+    file_ext = os.path.splitext(file_path)[1].lower()
+    
+    try:
+        if file_ext == '.pdf':
+            return extract_pdf_text(file_path)
+        elif file_ext == '.txt':
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        elif file_ext == '.docx':
+            from docx import Document
+            doc = Document(file_path)
+            return "".join(para.text + "\n" for para in doc.paragraphs)
+        else:
+            return "<span style='font-size: 20px; color: red;'>Error: Unsupported file format. Please upload a PDF, TXT, or DOCX file.</span>"
+    except Exception as e:
+        return f"<span style='font-size: 20px; color: red;'>Error: Failed to extract text from file: {str(e)}</span>"
+
+def iter_file_text(file_path, pages=None):
+    """Lazily yield the text of a PDF page by page, a TXT file line by line, or a DOCX paragraph by paragraph.
+
+    pages selects 0-based (start, end) PDF page ranges and is ignored for other formats.
+    """
+    file_ext = os.path.splitext(file_path)[1].lower()
+    if file_ext == '.pdf':
+        yield from iter_pdf_pages(file_path, pages)
+    elif file_ext == '.txt':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            yield from f
+    elif file_ext == '.docx':
+        from docx import Document
+        for para in Document(file_path).paragraphs:
+            yield para.text + "\n"
+    else:
+        raise ValueError("Unsupported file format. Please upload a PDF, TXT, or DOCX file.")
+
+def extract_context(file, budget, pages=None, file_hash=None):
+    """Extract only as much of the uploaded file as the prompt can use.
+
+    Parsing stops as soon as budget characters have been read, so the cost no
+    longer grows with document length. Results are cached per file and selection.
+    """
+    if file is None:
+        return ""
+
+    # Repeat uploads of the same selection skip parsing entirely
+    context_key = make_key(file_hash or hash_file(file.name), pages, budget)
+    text = text_cache.get(context_key)
+    if text is not None:
+        return text
+
+    file_ext = os.path.splitext(file.name)[1].lower()
+    if file_ext not in ('.pdf', '.txt', '.docx'):
+        return "<span style='font-size: 20px; color: red;'>Error: Unsupported file format. Please upload a PDF, TXT, or DOCX file.</span>"
+
+    try:
+        parts = []
+        size = 0
+        for piece in iter_file_text(file.name, pages):
+            parts.append(piece)
+            size += len(piece)
+            if size >= budget:
+                break
+        text = "".join(parts)[:budget]
+    except Exception as e:
+        return f"<span style='font-size: 20px; color: red;'>Error: Failed to extract text from file: {str(e)}</span>"
+
+    text_cache.put(context_key, text)
+    return text
+
+def load_chunk_index(file, pages=None, file_hash=None):
+    """Return (index, error) for the uploaded file, building and caching its ChunkIndex on first use.
+
+    The whole document (or page selection) is extracted once and indexed with
+    a BM25 ChunkIndex that is kept for later requests on the same file.
+    """
+    file_hash = file_hash or hash_file(file.name)
+    key = (file_hash, tuple(pages) if pages else None)
+    with chunk_indexes_lock:
+        index = chunk_indexes.get(key)
+        if index is not None:
+            chunk_indexes.move_to_end(key)
+            return index, None
+
+    if pages is None:
+        text = extract_text_from_file(file, file_hash)
+    else:
+        try:
+            text = "".join(iter_file_text(file.name, pages))
+        except Exception as e:
+            text = f"<span style='font-size: 20px; color: red;'>Error: Failed to extract text from file: {str(e)}</span>"
+    if text.startswith("<span"):
+        return None, text
+
+    index = ChunkIndex.from_text(text)
+    with chunk_indexes_lock:
+        chunk_indexes[key] = index
+        while len(chunk_indexes) > MAX_CHUNK_INDEXES:
+            chunk_indexes.popitem(last=False)
+    return index, None
+
+def extract_relevant_context(file, budget, query="", pages=None, file_hash=None):
+    """Pick the document passages most relevant to query (or most central, without one) up to budget characters."""
+    if file is None:
+        return ""
+    index, error = load_chunk_index(file, pages, file_hash)
+    return error or index.select(budget, query)
+
+def generate_fallback_question(difficulty, prompt_topic, question_type):
+    """Generate a placeholder question for the specified type and difficulty."""
+    if question_type == "Fill in the Blank":
+        return {
+            'difficulty': difficulty.lower(),
+            'text': f"Fill in the blank: A key concept of {prompt_topic} is _____.",
+            'answer': f"This is a placeholder {difficulty} fill-in-the-blank question."
+        }
+    elif question_type == "True/False":
+        return {
+            'difficulty': difficulty.lower(),
+            'text': f"Is {prompt_topic} a key concept? (True/False)",
+            'answer': "True"
+        }
+    elif question_type == "MCQ":
+        return {
+            'difficulty': difficulty.lower(),
+            'text': f"What is a key aspect of {prompt_topic}?",
+            'options': ["Option A", "Option B", "Option C", "Option D"],
+            'answer': "Option A"
+        }
+    else:  # Subjective
+        return {
+            'difficulty': difficulty.lower(),
+            'text': f"Explain a key concept related to {prompt_topic}.",
+            'answer': f"This is a placeholder {difficulty} subjective question."
+        }
+
+# One entry per (question type, output format)
+@lru_cache(maxsize=2 * len(QUESTION_TYPES))
+def format_prompt(question_type, structured=False):
+    """Static instructions and example for a question type, identical across requests."""
+    # Define question format based on type
+    format_instructions = ""
+    example = ""
+    if question_type == "Fill in the Blank":
+        format_instructions = (
+            "Each question must be a fill-in-the-blank question with a single blank (_____) in the question text. "
+            "The answer must be the word or short phrase that fills the blank."
+        )
+        example = (
+            "- Difficulty: Easy\n"
+            "- Question: The main source of energy for photosynthesis is _____.\n"
+            "- Answer: Sunlight\n"
+        )
+        json_example = {'difficulty': 'Easy', 'question': 'The main source of energy for photosynthesis is _____.', 'answer': 'Sunlight'}
+    elif question_type == "True/False":
+        format_instructions = (
+            "Each question must be a true/false question. The answer must be 'True' or 'False'."
+        )
+        example = (
+            "- Difficulty: Easy\n"
+            "- Question: Photosynthesis occurs in the chloroplasts. (True/False)\n"
+            "- Answer: True\n"
+        )
+        json_example = {'difficulty': 'Easy', 'question': 'Photosynthesis occurs in the chloroplasts. (True/False)', 'answer': 'True'}
+    elif question_type == "MCQ":
+        format_instructions = (
+            "Each question must be a multiple-choice question with exactly 4 options labeled A, B, C, D. "
+            "The question text must end with a question mark. "
+            "The answer must be the correct option (e.g., 'A')."
+        )
+        if not structured:
+            format_instructions += " List options as: - Option A: [text], - Option B: [text], etc."
+        example = (
+            "- Difficulty: Medium\n"
+            "- Question: What gas is produced during photosynthesis?\n"
+            "- Option A: Oxygen\n"
+            "- Option B: Carbon Dioxide\n"
+            "- Option C: Nitrogen\n"
+            "- Option D: Hydrogen\n"
+            "- Answer: A\n"
+        )
+        json_example = {
+            'difficulty': 'Medium', 'question': 'What gas is produced during photosynthesis?',
+            'options': ['Oxygen', 'Carbon Dioxide', 'Nitrogen', 'Hydrogen'], 'answer': 'A'
+        }
+    else:  # Subjective
+        format_instructions = (
+            "Each question must be a subjective question requiring a short descriptive answer (1-2 sentences). "
+            "The answer must provide a concise response."
+        )
+        example = (
+            "- Difficulty: Hard\n"
+            "- Question: Explain the role of chlorophyll in photosynthesis.\n"
+            "- Answer: Chlorophyll absorbs light energy, which is used to drive the photosynthesis process.\n"
+        )
+        json_example = {
+            'difficulty': 'Hard', 'question': 'Explain the role of chlorophyll in photosynthesis.',
+            'answer': 'Chlorophyll absorbs light energy, which is used to drive the photosynthesis process.'
+        }
+
+    if structured:
+        fields = '"difficulty" (Easy, Medium or Hard), "question", '
+        if question_type == "MCQ":
+            fields += '"options" (the 4 option texts in order A-D), '
+        return (
+            f"{format_instructions} "
+            'Respond with a JSON object of the form {"questions": [...]}. '
+            f'Each question is an object with {fields}and "answer", for example:\n'
+            f"{json.dumps(json_example)}"
+        )
+    return (
+        f"{format_instructions} "
+        "Each question MUST follow this EXACT format, with no extra text, introductions, or deviations:\n"
+        f"{example}\n"
+        "Ensure every question has a Difficulty, Question, and Answer line in this order, "
+        f"{'and 4 options for MCQ questions' if question_type == 'MCQ' else ''}."
+        "Do not include any additional text, headers, or formatting outside the specified structure."
+    )
+
+def build_messages(prompt_topic, context, question_type, easy_questions, medium_questions, hard_questions, structured=False, max_tokens=None):
+    """Build the chat messages asking for the given number of questions per difficulty.
+
+    The prompt runs from most to least stable: the system message with the
+    static format_prompt for the question type, then the document context,
+    then the counts for this request. Requests of the same type (and top-ups
+    for the same document) share a prefix the backend can reuse from its KV
+    cache. With structured, the model is asked for a JSON object matching
+    question_schema instead of the line-based format. The context is trimmed
+    to the tokens token_budget leaves once the prompt and a reply of
+    max_tokens are reserved.
+    """
+    total_questions = easy_questions + medium_questions + hard_questions
+    system = f"{system_message}\n\n{format_prompt(question_type, structured)}"
+    request = (
+        f"Generate EXACTLY {total_questions} {question_type} questions based on {prompt_topic}. "
+        f"You MUST create EXACTLY {easy_questions} Easy questions, {medium_questions} Medium questions, and {hard_questions} Hard questions."
+    )
+
+    message = request
+    if context:
+        header = "Context from the document (use this to generate relevant questions):\n"
+        prompt_tokens = estimate_tokens(system) + estimate_tokens(header + request)
+        available = token_budget.context_tokens_for(prompt_tokens, max_tokens or token_budget.max_output_tokens)
+        context = token_budget.trim(context, available)
+        if context:
+            message = f"{header}{context}\n\n{request}"
+
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": message}
+    ]
+
+class QuestionStreamParser:
+    """Incrementally parse streamed model output into complete question dicts."""
+
+    valid_difficulties = {'easy', 'medium', 'hard'}
+
+    def __init__(self, question_type):
+        self.question_type = question_type
+        self.buffer = ""
+        self.current_question = {}
+        self.option_count = 0
+
+    def feed(self, content):
+        """Consume a chunk of text and return the questions completed by it."""
+        self.buffer += content
+        *lines, self.buffer = self.buffer.split('\n')
+        questions = []
+        for line in lines:
+            question = self._parse_line(line)
+            if question:
+                questions.append(question)
+        return questions
+
+    def close(self):
+        """Flush any buffered text and return the remaining completed questions."""
+        questions = self.feed('\n')
+        question = self._finish()
+        if question:
+            questions.append(question)
+        return questions
+
+    def _is_complete(self):
+        q = self.current_question
+        if not (q.get('difficulty') and q.get('text') and q.get('answer')):
+            return False
+        return self.question_type != "MCQ" or self.option_count == 4
+
+    def _finish(self):
+        question = self.current_question if self._is_complete() else None
+        if question:
+            self.current_question = {}
+        return question
+
+    def _parse_line(self, line):
+        line = line.strip()
+        if not line:
+            return None
+        question = None
+        if line.startswith('- Difficulty:'):
+            question = self._finish()
+            difficulty = line.replace('- Difficulty:', '').strip().lower()
+            if difficulty in self.valid_difficulties:
+                self.current_question = {'difficulty': difficulty}
+                self.option_count = 0
+                if self.question_type == "MCQ":
+                    self.current_question['options'] = []
+            else:
+                self.current_question = {}
+        elif line.startswith('- Question:') and self.current_question:
+            self.current_question['text'] = line.replace('- Question:', '').strip()
+        elif line.startswith('- Option ') and self.current_question and self.question_type == "MCQ":
+            option_text = line.replace(f'- Option {chr(65 + self.option_count)}:', '').strip()
+            self.current_question['options'].append(option_text)
+            self.option_count += 1
+        elif line.startswith('- Answer:') and self.current_question:
+            self.current_question['answer'] = line.replace('- Answer:', '').strip()
+            # The answer line closes a question, so emit it without waiting for the next one
+            question = self._finish()
+        return question
+
+def parse_questions(response, question_type):
+    """Parse the line-based model response into question dicts."""
+    parser = QuestionStreamParser(question_type)
+    return parser.feed(response) + parser.close()
+
+def quotas_met(questions, quotas):
+    """Check whether the parsed questions satisfy every per-difficulty quota."""
+    counts = {'easy': 0, 'medium': 0, 'hard': 0}
+    for q in questions:
+        counts[q['difficulty']] += 1
+    return all(counts[d] >= n for d, n in quotas.items())
+
+def request_questions(messages, question_type, label="", quotas=None, on_question=None, deadline=None, max_tokens=4000, should_stop=None):
+    """Run one streamed model request and return the parsed questions.
+
+    Questions are parsed as chunks arrive and passed to on_question, which may
+    return False to reject one (e.g. a duplicate). Rejected questions don't
+    count toward the quotas, and the stream is closed early once the
+    per-difficulty quotas are satisfied, the deadline (a time.monotonic()
+    value) passes or should_stop(), if given, returns True. Raises BackendBusy if model_gate can't admit the call and
+    CircuitOpen while model_breaker is refusing calls.
+    """
+    # Wait for a backend slot (or fail fast when saturated) and hold it while the response streams
+    with model_gate.admit():
+        model_breaker.allow()
+        healthy = True
+        try:
+            with backend_pool.acquire() as backend:
+                left = time_left(deadline)
+                options = {'timeout': max(1.0, left)} if left is not None else {}
+                if STRUCTURED_OUTPUT:
+                    options['response_format'] = response_format(question_type)
+                started = time.perf_counter()
+                stream = backend.client.chat.completions.create(
+                    model=MODEL,
+                    messages=messages,
+                    stream=True,
+                    temperature=TEMPERATURE,
+                    max_tokens=max_tokens,
+                    **options
+                )
+
+                # Parse the response as it streams in
+                parser = JsonQuestionStreamParser(question_type) if STRUCTURED_OUTPUT else QuestionStreamParser(question_type)
+                questions = []
+                chunks = []
+                stopped_early = False
+                first_token = None
+                parsing = 0.0
+                parsed = 0
+                for chunk in stream:
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        if first_token is None:
+                            first_token = time.perf_counter()
+                        chunks.append(content)
+                        parse_start = time.perf_counter()
+                        fed = parser.feed(content)
+                        parsing += time.perf_counter() - parse_start
+                        parsed += len(fed)
+                        for question in fed:
+                            if not on_question or on_question(question) is not False:
+                                questions.append(question)
+                        if ((quotas and quotas_met(questions, quotas)) or (deadline is not None and time.monotonic() >= deadline)
+                                or (should_stop and should_stop())):
+                            stopped_early = True
+                            break
+                if stopped_early:
+                    stream.close()
+                else:
+                    parse_start = time.perf_counter()
+                    leftover = parser.close()
+                    if STRUCTURED_OUTPUT and not parser.decoded:
+                        # The backend ignored the JSON format, so read the reply with the line-based parser
+                        leftover = parse_questions("".join(chunks), question_type)
+                    parsing += time.perf_counter() - parse_start
+                    parsed += len(leftover)
+                    for question in leftover:
+                        if not on_question or on_question(question) is not False:
+                            questions.append(question)
+        except node_errors():
+            healthy = False
+            raise
+        finally:
+            model_breaker.record(healthy)
+
+    finished = time.perf_counter()
+    stream_seconds.observe(finished - started)
+    parse_seconds.observe(parsing)
+    if first_token is not None:
+        ttft_seconds.observe(first_token - started)
+        # Ollama streams one token per chunk
+        if finished > first_token and len(chunks) > 1:
+            tokens_per_second.observe((len(chunks) - 1) / (finished - first_token))
+
+    response = "".join(chunks)
+    if not response.strip():
+        log.warning(f"{label}Attempt failed: No response from the model.")
+        return []
+
+    if stopped_early:
+        log.info(f"{label}Stopped the stream early after {len(questions)} questions.")
+    invalid = parser.invalid if STRUCTURED_OUTPUT else 0
+    if invalid:
+        log.warning(f"{label}Dropped {invalid} malformed questions from the JSON response.")
+    # A reply that parsed into fewer questions than asked for is the one worth reading
+    failed = invalid > 0 or (not stopped_early and parsed < (sum(quotas.values()) if quotas else 1))
+    if response_sampler.should_log(failed):
+        log.info(f"{label}Raw model response", extra={'response': response, 'parsed': parsed, 'parse_failed': failed})
+    return questions
+
+def report_status(progress, message):
+    """Log a status message and forward it to the progress callback, if any."""
+    log.info(message)
+    if progress:
+        progress('status', message)
+
+def fill_quotas(prompt_topic, context, question_type, quotas, max_retries=3, progress=None, label="", deduper=None, deadline=None, should_stop=None):
+    """Generate questions until every per-difficulty quota is met.
+
+    Valid questions are kept across attempts and each retry only asks the model
+    for the remaining deficit, at most token_budget.max_questions at a time so
+    replies fit in max_tokens. Attempts that add new questions don't count
+    against max_retries, up to a hard cap of twice that many requests plus
+    one per extra batch.
+    Near-duplicates rejected by deduper (shared between concurrent calls when
+    given) are dropped and regenerated as part of the deficit. Failed requests
+    are retried after retry_policy's backoff. Generation stops early once
+    the deadline passes, should_stop() returns True or while model_breaker
+    is open, and when model_gate turns away a retry; BackendBusy only
+    propagates from the first attempt.
+    """
+    collected = {difficulty: [] for difficulty in quotas}
+    deduper = deduper or NearDuplicateFilter()
+
+    def accept(question):
+        difficulty = question['difficulty']
+        if difficulty not in collected or len(collected[difficulty]) >= quotas[difficulty]:
+            return False
+        if not deduper.add(question):
+            log.debug(f"{label}Dropped near-duplicate question: {question['text']}")
+            return False
+        collected[difficulty].append(question)
+        if progress:
+            progress('question', question)
+        return True
+
+    def summary():
+        return ", ".join(f"{len(collected[d])} {d} (needed {n})" for d, n in quotas.items())
+
+    batch = token_budget.max_questions(question_type)
+    max_attempts = max_retries * 2 + math.ceil(sum(quotas.values()) / batch) - 1
+    attempt = 0
+    failures = 0
+    while failures < max_retries and attempt < max_attempts:
+        deficit = {d: n - len(collected[d]) for d, n in quotas.items() if n > len(collected[d])}
+        if not deficit:
+            break
+        # Ask for no more than one reply can hold; the next attempts request the rest
+        room = batch
+        for difficulty, n in deficit.items():
+            deficit[difficulty] = min(n, room)
+            room -= deficit[difficulty]
+        deficit = {d: n for d, n in deficit.items() if n}
+        if deadline is not None and time.monotonic() >= deadline:
+            report_status(progress, f"{label}Out of time: Got {summary()}.")
+            break
+        if should_stop and should_stop():
+            report_status(progress, f"{label}Stopped: Got {summary()}.")
+            break
+        attempt += 1
+        before = sum(len(bucket) for bucket in collected.values())
+        try:
+            report_status(progress, f"{label}Attempt {attempt} to generate questions ({', '.join(f'{n} {d}' for d, n in deficit.items())})...")
+            # Reserve only as many reply tokens as the deficit needs, leaving the rest of the window for context
+            max_tokens = token_budget.output_tokens(question_type, sum(deficit.values()))
+            messages = build_messages(
+                prompt_topic, context, question_type,
+                deficit.get('easy', 0), deficit.get('medium', 0), deficit.get('hard', 0), STRUCTURED_OUTPUT, max_tokens
+            )
+            prompt_token_count.observe(sum(estimate_tokens(message['content']) for message in messages))
+            request_questions(messages, question_type, label, deficit, accept, deadline, max_tokens, should_stop)
+        except CircuitOpen as e:
+            # The backend is known to be down, so don't spend the request's time retrying
+            report_status(progress, f"{label}Skipping generation: {str(e)}.")
+            break
+        except BackendBusy as e:
+            # A retry that can't get a slot keeps what earlier attempts collected; the bank and fallback fill the rest
+            if attempt == 1:
+                raise
+            report_status(progress, f"{label}Stopping after attempt {attempt - 1}: Model backend busy ({str(e)}). Got {summary()}.")
+            break
+        except api_error() as e:
+            failures += 1
+            report_status(progress, f"{label}Attempt {attempt} failed: Model request error: {str(e)}")
+            if failures < max_retries:
+                delay = retry_policy.delay(failures)
+                left = time_left(deadline)
+                if left is not None and delay >= left:
+                    report_status(progress, f"{label}Out of time: Got {summary()}.")
+                    break
+                time.sleep(delay)
+            continue
+
+        if sum(len(bucket) for bucket in collected.values()) == before:
+            failures += 1
+        if all(len(collected[d]) >= n for d, n in quotas.items()):
+            report_status(progress, f"{label}Success: Got {summary()}.")
+        else:
+            report_status(progress, f"{label}Attempt {attempt} incomplete: Got {summary()}, topping up the rest.")
+
+    if attempt:
+        retry_count.observe(attempt - 1)
+    return collected
+
+def generate_bucket(prompt_topic, context, question_type, difficulty, count, max_retries=3, progress=None, deduper=None, deadline=None):
+    """Generate the questions for a single difficulty, retrying only this bucket on failure."""
+    if count <= 0:
+        return []
+    return fill_quotas(prompt_topic, context, question_type, {difficulty: count}, max_retries, progress, f"[{difficulty}] ", deduper, deadline)[difficulty]
+
+def busy_tolerant(futures):
+    """Each future's result, or None where the model backend was too busy to start; re-raises BackendBusy if every one was."""
+    results, busy = [], None
+    for future in futures:
+        try:
+            results.append(future.result())
+        except BackendBusy as e:
+            busy = e
+            results.append(None)
+    if busy and all(result is None for result in results):
+        raise busy
+    return results
+
+def generate_buckets_parallel(prompt_topic, context, question_type, easy_questions, medium_questions, hard_questions, max_retries=3, progress=None, deduper=None, deadline=None):
+    """Generate the Easy, Medium and Hard quotas as concurrent model requests."""
+    quotas = {'easy': easy_questions, 'medium': medium_questions, 'hard': hard_questions}
+    deduper = deduper or NearDuplicateFilter()
+    with ThreadPoolExecutor(max_workers=len(quotas)) as executor:
+        futures = {
+            difficulty: executor.submit(in_context(generate_bucket), prompt_topic, context, question_type, difficulty, count, max_retries, progress, deduper, deadline)
+            for difficulty, count in quotas.items()
+        }
+        results = busy_tolerant([futures['easy'], futures['medium'], futures['hard']])
+    return tuple(bucket if bucket is not None else [] for bucket in results)
+
+def collect_questions(prompt_topic, context, question_type, easy_questions, medium_questions, hard_questions, parallel=False, max_retries=3, progress=None, deduper=None, deadline=None):
+    """Run the model with top-up retries and return the (easy, medium, hard) question lists.
+
+    progress, if given, is called as progress(kind, payload) with 'question'
+    for every accepted question and 'status' with retry messages.
+    """
+    if parallel:
+        return generate_buckets_parallel(
+            prompt_topic, context, question_type, easy_questions, medium_questions, hard_questions, max_retries, progress, deduper, deadline
+        )
+
+    collected = fill_quotas(prompt_topic, context, question_type, {
+        'easy': easy_questions, 'medium': medium_questions, 'hard': hard_questions
+    }, max_retries, progress, "", deduper, deadline)
+    return collected['easy'], collected['medium'], collected['hard']
+
+def take_from_bank(source, question_type, quotas, deduper, progress=None):
+    """Fill as much of each per-difficulty quota as the question bank can."""
+    banked = {}
+    for difficulty, count in quotas.items():
+        banked[difficulty] = deduper.filter(question_bank.take(source, question_type, difficulty, count))
+        if progress:
+            for q in banked[difficulty]:
+                progress('question', q)
+    served = sum(len(bucket) for bucket in banked.values())
+    if served:
+        report_status(progress, f"Question bank supplied {served} of {sum(quotas.values())} questions.")
+    return banked
+
+def pregenerate(topic, question_type, difficulty, count):
+    """Generate questions for the bank in the background, with a single short attempt.
+
+    Questions near-duplicating ones already banked are dropped, and the
+    attempt is abandoned as soon as a live request starts.
+    """
+    deduper = NearDuplicateFilter()
+    deduper.filter(question_bank.questions(make_source(topic), question_type))
+    collected = fill_quotas(
+        f"the topic '{topic}'", "", question_type, {difficulty: count}, max_retries=1, label="[pregen] ",
+        deduper=deduper, deadline=time.monotonic() + PREGEN_DEADLINE, should_stop=live_activity.busy
+    )
+    return collected[difficulty]
+
+def split_quotas(quotas, sections):
+    """Spread per-difficulty counts over sections as evenly as possible."""
+    shares = [{difficulty: 0 for difficulty in quotas} for _ in range(sections)]
+    i = 0
+    for difficulty, count in quotas.items():
+        for _ in range(count):
+            shares[i % sections][difficulty] += 1
+            i += 1
+    return shares
+
+def generate_map_reduce(index, prompt_topic, question_type, easy_questions, medium_questions, hard_questions, max_retries=3, progress=None, deduper=None, deadline=None):
+    """Generate a share of the questions from each document section concurrently, then merge them.
+
+    Near-duplicates across sections are dropped as they arrive, and the reduce
+    step tops up any shortfall from a whole-document context, so the result
+    still matches the requested (easy, medium, hard) counts whenever the model
+    cooperates.
+    """
+    quotas = {'easy': easy_questions, 'medium': medium_questions, 'hard': hard_questions}
+    sections = max(1, min(MAX_SECTIONS, sum(quotas.values()), -(-index.total_chars // SECTION_CHARS)))
+    contexts = index.section_contexts(sections, CONTEXT_CHARS)
+    shares = split_quotas(quotas, len(contexts))
+    deduper = deduper or NearDuplicateFilter()
+
+    # Map: one top-up generation per section, sharing one near-duplicate filter
+    with ThreadPoolExecutor(max_workers=min(len(contexts), MAP_WORKERS)) as executor:
+        futures = [
+            executor.submit(in_context(fill_quotas), prompt_topic, context, question_type, share, max_retries, progress, f"[section {i}/{len(contexts)}] ", deduper, deadline)
+            for i, (context, share) in enumerate(zip(contexts, shares), 1)
+            if any(share.values())
+        ]
+        results = [collected for collected in busy_tolerant(futures) if collected is not None]
+
+    # Reduce: merge and top up what duplicates or failed sections left missing
+    merged = {difficulty: [] for difficulty in quotas}
+
+    def merge(collected):
+        for difficulty, bucket in collected.items():
+            merged[difficulty].extend(bucket[:quotas[difficulty] - len(merged[difficulty])])
+
+    for collected in results:
+        merge(collected)
+    deficit = {d: n - len(merged[d]) for d, n in quotas.items() if n > len(merged[d])}
+    if deficit:
+        report_status(progress, f"Topping up {sum(deficit.values())} questions lost to duplicates or failed sections...")
+        try:
+            merge(fill_quotas(prompt_topic, index.select(CONTEXT_CHARS), question_type, deficit, max_retries, progress, "[reduce] ", deduper, deadline))
+        except BackendBusy as e:
+            # The sections already produced questions, so the fallback fills the rest rather than failing the request
+            report_status(progress, f"Skipping the top-up: Model backend busy ({str(e)}).")
+    return merged['easy'], merged['medium'], merged['hard']
+
+def render_markdown(prompt_topic, question_type, easy, medium, hard):
+    """Render the quiz as markdown with each answer on a new line."""
+    started = time.perf_counter()
+    markdown_output = f"# {question_type} Quiz on {prompt_topic}\n\n"
+    for title, bucket in (("Easy", easy), ("Medium", medium), ("Hard", hard)):
+        if bucket:
+            markdown_output += f"## {title} Questions\n"
+            for i, q in enumerate(bucket, 1):
+                markdown_output += f"**{i}. {q['text']}**\n\n"
+                if question_type == "MCQ":
+                    for j, opt in enumerate(q.get('options', [])):
+                        markdown_output += f"- {chr(65 + j)}. {opt}\n"
+                    markdown_output += "\n"
+                markdown_output += f"Answer: *{q['answer']}*\n\n"
+    render_seconds.observe(time.perf_counter() - started)
+    return markdown_output
+
+def quiz_update(markdown, pdf=None, quiz=None, error=False, busy=False, internal=False):
+    """One update yielded by stream_quiz."""
+    return {'markdown': markdown, 'pdf': pdf, 'quiz': quiz, 'error': error, 'busy': busy, 'internal': internal}
+
+def error_text(markdown):
+    """Plain message of an error update, without the HTML styling used by the UI."""
+    return re.sub(r"<[^>]+>", "", markdown)
+
+# Stand-in for the upload object Gradio passes to stream_quiz, for callers outside the UI
+UploadedFile = namedtuple('UploadedFile', 'name')
+
+def build_quiz(file, topic, easy_questions, medium_questions, hard_questions, question_type, parallel, pages, use_index, map_reduce, use_bank, file_hash, bank_source, cache_key, request_id=None):
+    """Generate a validated, uncached quiz request for stream_quiz, yielding quiz_update dicts.
+
+    Unexpected errors propagate to stream_quiz, which reports them.
+    """
+    # Extract text from file if provided
+    started = time.perf_counter()
+    index = None
+    if map_reduce and file is not None:
+        index, file_content = load_chunk_index(file, pages, file_hash)
+        if index is not None:
+            file_content = index.select(CONTEXT_CHARS)
+    elif use_index:
+        file_content = extract_relevant_context(file, CONTEXT_CHARS, topic or "", pages, file_hash)
+    else:
+        file_content = extract_context(file, CONTEXT_CHARS, pages, file_hash)
+    if file is not None:
+        extract_seconds.observe(time.perf_counter() - started)
+    if file_content.startswith("<span"):
+        yield quiz_update(file_content, error=True)
+        return
+
+    # Use file content if provided, otherwise use topic
+    if file_content:
+        context = file_content
+        prompt_topic = "the uploaded document"
+    elif topic:
+        context = ""
+        prompt_topic = f"the topic '{topic}'"
+    else:
+        yield quiz_update("<span style='font-size: 20px; color: red;'>Error: Please provide either a topic or an uploaded file.</span>", error=True)
+        return
+
+    # Run generation on a worker thread and render its progress events as they arrive
+    max_retries = 3
+    events = queue.Queue()
+    result = {}
+
+    def worker():
+        progress = lambda kind, payload: events.put((kind, payload))
+        fresh = []
+
+        def generation_progress(kind, payload):
+            if kind == 'question':
+                fresh.append(payload)
+            progress(kind, payload)
+        deadline = time.monotonic() + QUIZ_DEADLINE
+        banked = {}
+        with live_activity:
+            try:
+                # Serve what we can from the question bank and only generate the shortfall
+                quotas = {'easy': easy_questions, 'medium': medium_questions, 'hard': hard_questions}
+                deduper = NearDuplicateFilter()
+                banked = take_from_bank(bank_source, question_type, quotas, deduper, progress) if use_bank else {d: [] for d in quotas}
+                need = [quotas[d] - len(banked[d]) for d in ('easy', 'medium', 'hard')]
+
+                if not any(need):
+                    generated = [], [], []
+                elif index is not None and context:
+                    generated = generate_map_reduce(index, prompt_topic, question_type, *need, max_retries, generation_progress, deduper, deadline)
+                else:
+                    generated = collect_questions(prompt_topic, context, question_type, *need, parallel, max_retries, generation_progress, deduper, deadline)
+
+                question_bank.add(bank_source, question_type, [q for bucket in generated for q in bucket], served=True)
+                result['questions'] = tuple(banked[d] + bucket for d, bucket in zip(('easy', 'medium', 'hard'), generated))
+            except Exception as e:
+                result['error'] = e
+                # The request failed (e.g. BackendBusy), so banked questions go back to the bank instead of sitting out the cooldown
+                taken = [q for bucket in banked.values() for q in bucket]
+                if taken:
+                    question_bank.release(bank_source, question_type, taken)
+                # Keep what the model produced before the failure (e.g. BackendBusy from a parallel bucket) for later requests
+                if fresh:
+                    question_bank.add(bank_source, question_type, fresh)
+            finally:
+                events.put(('done', None))
+
+    threading.Thread(target=in_request(request_id, worker), daemon=True).start()
+
+    partial = {'easy': [], 'medium': [], 'hard': []}
+    status = "Generating questions..."
+    while True:
+        kind, payload = events.get()
+        if kind == 'done':
+            break
+        if kind == 'question':
+            partial[payload['difficulty']].append(payload)
+        elif kind == 'status':
+            status = payload
+        yield quiz_update(render_markdown(prompt_topic, question_type, partial['easy'], partial['medium'], partial['hard']) + f"*{status}*\n")
+
+    if 'error' in result:
+        raise result['error']
+    easy, medium, hard = result['questions']
+
+    # Add fallback questions
+    used_fallback = len(easy) < easy_questions or len(medium) < medium_questions or len(hard) < hard_questions
+    fallback_count.observe(max(0, easy_questions - len(easy)) + max(0, medium_questions - len(medium)) + max(0, hard_questions - len(hard)))
+    if len(easy) < easy_questions:
+        for _ in range(easy_questions - len(easy)):
+            easy.append(generate_fallback_question('easy', prompt_topic, question_type))
+    if len(medium) < medium_questions:
+        for _ in range(medium_questions - len(medium)):
+            medium.append(generate_fallback_question('medium', prompt_topic, question_type))
+    if len(hard) < hard_questions:
+        for _ in range(hard_questions - len(hard)):
+            hard.append(generate_fallback_question('hard', prompt_topic, question_type))
+
+    # Validate final counts
+    if (len(easy) < easy_questions or 
+        len(medium) < medium_questions or 
+        len(hard) < hard_questions):
+        yield quiz_update(
+            f"<span style='font-size: 20px; color: red;'>Error: Could not generate the requested number of questions after {max_retries} attempts. "
+            f"Got {len(easy)} easy (needed {easy_questions}), {len(medium)} medium (needed {medium_questions}), "
+            f"{len(hard)} hard (needed {hard_questions}).</span>", error=True, internal=True
+        )
+        return
+
+    # Trim excess questions
+    easy = easy[:easy_questions]
+    medium = medium[:medium_questions]
+    hard = hard[:hard_questions]
+
+    markdown_output = render_markdown(prompt_topic, question_type, easy, medium, hard)
+    yield quiz_update(markdown_output + "*Building PDF...*\n")
+
+    # Generate PDF
+    with pdf_seconds.time():
+        pdf_file = create_pdf(prompt_topic, easy, medium, hard, question_type)
+    quiz = {
+        'title': f"{question_type} Quiz on {prompt_topic}",
+        'question_type': question_type,
+        'easy': easy,
+        'medium': medium,
+        'hard': hard,
+        'used_fallback': used_fallback
+    }
+
+    # Placeholder questions are not worth serving again
+    if cache_key and not used_fallback:
+        quiz_cache.put(cache_key, markdown_output, pdf_file, quiz)
+    quiz_seconds.observe(time.perf_counter() - started)
+    yield quiz_update(markdown_output, pdf_file, quiz)
+
+def stream_quiz(file, topic, total_questions, easy_questions, medium_questions, hard_questions, question_type, parallel=False, regenerate=False, page_range="", use_index=False, map_reduce=False, use_bank=True, request_id=None):
+    """Generate a quiz, yielding quiz_update dicts as questions are parsed.
+
+    Intermediate updates carry the partial markdown and a status line; the
+    final one also carries the PDF path and the structured quiz (title,
+    question_type, easy/medium/hard question lists). Errors are reported as a
+    single update with error set. Identical
+    requests are served from quiz_cache and the question bank unless
+    regenerate is set. page_range
+    (e.g. "1-20, 35") limits which PDF pages are parsed. With use_index the
+    context is picked from the whole document, guided by topic, instead of
+    taken from its beginning. With map_reduce, long documents are split into
+    sections that each contribute a share of the questions. With use_bank,
+    questions banked for the same topic or document are served first and only
+    the shortfall is generated. Concurrent identical requests share one
+    generation and all receive its updates. If the model backend is saturated, requests
+    the cache or bank can't fully serve get a single update with busy set;
+    errors that aren't caused by the request itself set internal.
+    Log records for the request carry request_id (a new one if not given).
+    """
+    request_id = request_id or new_request_id()
+    try:
+        # Convert inputs to integers
+        try:
+            total_questions = int(total_questions)
+            easy_questions = int(easy_questions)
+            medium_questions = int(medium_questions)
+            hard_questions = int(hard_questions)
+        except ValueError:
+            yield quiz_update("<span style='font-size: 20px; color: red;'>Error: Please enter valid numbers for question counts.</span>", error=True)
+            return
+
+        # Validate inputs
+        if total_questions <= 0:
+            yield quiz_update("<span style='font-size: 20px; color: red;'>Error: Total questions must be positive.</span>", error=True)
+            return
+        if easy_questions < 0 or medium_questions < 0 or hard_questions < 0:
+            yield quiz_update("<span style='font-size: 20px; color: red;'>Error: Question counts cannot be negative.</span>", error=True)
+            return
+        if easy_questions + medium_questions + hard_questions != total_questions:
+            yield quiz_update("<span style='font-size: 20px; color: red;'>Error: The sum of Easy, Medium, and Hard questions must equal the total number of questions.</span>", error=True)
+            return
+        if question_type not in QUESTION_TYPES:
+            yield quiz_update(f"<span style='font-size: 20px; color: red;'>Error: Unknown question type. Choose one of: {', '.join(QUESTION_TYPES)}.</span>", error=True)
+            return
+
+        try:
+            pages = parse_page_range(page_range) if file is not None else None
+        except ValueError:
+            yield quiz_update("<span style='font-size: 20px; color: red;'>Error: Invalid page range. Use a format like 1-20, 35.</span>", error=True)
+            return
+
+        # Serve identical requests from the cache
+        cache_key = None
+        file_hash = hash_file(file.name) if file is not None else None
+        bank_source = make_source(topic, file_hash, pages)
+        if file is not None or topic:
+            question_bank.record_request(
+                bank_source, topic.strip() if file is None else None, question_type, easy_questions, medium_questions, hard_questions
+            )
+            if file is not None:
+                source = ('file', file_hash, use_index, map_reduce, topic.strip() if use_index and topic else "")
+            else:
+                source = ('topic', topic.strip())
+            cache_key = make_key(
+                source, pages, easy_questions, medium_questions, hard_questions, question_type, MODEL, TEMPERATURE, PROMPT_VERSION, STRUCTURED_OUTPUT, token_budget.context_tokens
+            )
+            cached = None if regenerate else quiz_cache.get(cache_key)
+            if cached:
+                log.info("Cache hit", extra={'request_id': request_id, 'cache': quiz_cache.stats()})
+                yield quiz_update(*cached)
+                return
+
+        # Identical requests already in flight attach to that generation instead of starting another;
+        # regenerate and use_bank change how it is built, so they are part of the flight key
+        build = lambda: build_quiz(
+            file, topic, easy_questions, medium_questions, hard_questions, question_type, parallel,
+            pages, use_index, map_reduce, use_bank and not regenerate, file_hash, bank_source, cache_key, request_id
+        )
+        if cache_key:
+            with request_context(request_id):
+                updates = quiz_flights.stream((cache_key, regenerate, use_bank), build)
+            yield from updates
+        else:
+            yield from build()
+
+    except BackendBusy as e:
+        log.warning(f"Model backend busy ({str(e)})", extra={'request_id': request_id, 'model_gate': model_gate.stats()})
+        yield quiz_update("<span style='font-size: 20px; color: red;'>Error: The quiz generator is busy right now. Please try again in a moment.</span>", error=True, busy=True)
+    except Exception as e:
+        log.exception("Quiz generation failed", extra={'request_id': request_id})
+        yield quiz_update(f"<span style='font-size: 20px; color: red;'>Error: An unexpected error occurred: {str(e)}</span>", error=True, internal=True)
+
+def run_quiz(*args, **kwargs):
+    """Run stream_quiz to completion and return its final update."""
+    update = None
+    for update in stream_quiz(*args, **kwargs):
+        pass
+    return update
+
+def create_pdf(topic, easy_questions, medium_questions, hard_questions, question_type):
+    """Create a PDF file with the quiz content."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+        pdf_path = temp_file.name
+
+    doc = SimpleDocTemplate(pdf_path, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+
+    story.append(Paragraph(f"{question_type} Quiz on {topic}", styles['Title']))
+    story.append(Spacer(1, 12))
+
+    if easy_questions:
+        story.append(Paragraph("Easy Questions", styles['Heading2']))
+        story.append(Spacer(1, 12))
+        for i, q in enumerate(easy_questions, 1):
+            story.append(Paragraph(f"{i}. {q['text']}", styles['BodyText']))
+            story.append(Spacer(1, 6))
+            if question_type == "MCQ":
+                for j, opt in enumerate(q.get('options', [])):
+                    story.append(Paragraph(f"{chr(65 + j)}. {opt}", styles['BodyText']))
+                story.append(Spacer(1, 6))
+            story.append(Paragraph(f"Answer: {q['answer']}", styles['Italic']))
+            story.append(Spacer(1, 12))
+
+    if medium_questions:
+        story.append(Paragraph("Medium Questions", styles['Heading2']))
+        story.append(Spacer(1, 12))
+        for i, q in enumerate(medium_questions, 1):
+            story.append(Paragraph(f"{i}. {q['text']}", styles['BodyText']))
+            story.append(Spacer(1, 6))
+            if question_type == "MCQ":
+                for j, opt in enumerate(q.get('options', [])):
+                    story.append(Paragraph(f"{chr(65 + j)}. {opt}", styles['BodyText']))
+                story.append(Spacer(1, 6))
+            story.append(Paragraph(f"Answer: {q['answer']}", styles['Italic']))
+            story.append(Spacer(1, 12))
+
+    if hard_questions:
+        story.append(Paragraph("Hard Questions", styles['Heading2']))
+        story.append(Spacer(1, 12))
+        for i, q in enumerate(hard_questions, 1):
+            story.append(Paragraph(f"{i}. {q['text']}", styles['BodyText']))
+            story.append(Spacer(1, 6))
+            if question_type == "MCQ":
+                for j, opt in enumerate(q.get('options', [])):
+                    story.append(Paragraph(f"{chr(65 + j)}. {opt}", styles['BodyText']))
+                story.append(Spacer(1, 6))
+            story.append(Paragraph(f"Answer: {q['answer']}", styles['Italic']))
+            story.append(Spacer(1, 12))
+
+    doc.build(story)
+    return pdf_path
+
+def init():
+    """Start logging, open the caches and question bank, and start the background threads.
+
+    Importing this module has no side effects; app.py, api.py and batch.py
+    call init() once at startup. Later calls do nothing.
+    """
+    global quiz_cache, text_cache, question_bank, pregen_worker, _initialized
+    with _init_lock:
+        if _initialized:
+            return
+        _initialized = True
+
+        # JSON-lines logs (LOG_LEVEL) written off the request path
+        setup_logging(os.getenv("LOG_LEVEL", "INFO"))
+
+        cache_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+        quiz_cache = QuizCache(
+            os.getenv("QUIZ_CACHE_DIR", os.path.join(cache_root, "quizzes")),
+            max_entries=int(os.getenv("QUIZ_CACHE_SIZE", "128")),
+            ttl=int(os.getenv("QUIZ_CACHE_TTL", str(7 * 24 * 3600))),
+            max_disk_entries=int(os.getenv("QUIZ_CACHE_DISK_ENTRIES", "1024"))
+        )
+        text_cache = TextCache(
+            os.getenv("TEXT_CACHE_DIR", os.path.join(cache_root, "texts")),
+            max_bytes=int(os.getenv("TEXT_CACHE_MAX_MB", "512")) * 1024 * 1024
+        )
+        question_bank = QuestionBank(
+            os.getenv("QUESTION_BANK_PATH", os.path.join(cache_root, "questions.db")),
+            cooldown=int(os.getenv("QUESTION_BANK_COOLDOWN", str(24 * 3600)))
+        )
+
+        if len(backend_pool.backends) > 1:
+            backend_pool.start()
+        # Load the model at startup instead of on the first request, and keep it loaded between recent requests
+        if os.getenv("MODEL_WARMUP", "1") == "1":
+            backend_pool.keep_warm(
+                MODEL, os.getenv("MODEL_KEEP_ALIVE", "30m"), float(os.getenv("MODEL_KEEP_ALIVE_INTERVAL", "240")), live_activity.idle_for
+            )
+
+        pregen_worker = PregenWorker(
+            question_bank, pregenerate, live_activity,
+            targets=load_targets(os.getenv("PREGEN_TARGETS")),
+            depth=int(os.getenv("PREGEN_DEPTH", "5")),
+            idle_seconds=int(os.getenv("PREGEN_IDLE_SECONDS", "30"))
+        )
+        if os.getenv("PREGEN_ENABLED", "0") == "1":
+            pregen_worker.start()
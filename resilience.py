@@ -0,0 +1,80 @@
+import logging
+import random
+import threading
+import time
+
+log = logging.getLogger("quiz.breaker")
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling the model while the circuit breaker is open."""
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: retry n waits a random time up to base * factor ** (n - 1), capped at max_delay."""
+
+    def __init__(self, base=0.5, factor=2.0, max_delay=8.0):
+        self.base = base
+        self.factor = factor
+        self.max_delay = max_delay
+
+    def delay(self, retry):
+        return random.uniform(0, min(self.max_delay, self.base * self.factor ** (retry - 1)))
+
+
+def time_left(deadline):
+    """Seconds until a time.monotonic() deadline, or None when there is no deadline."""
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class CircuitBreaker:
+    """Stop calling a backend that keeps failing, then probe it for recovery.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    are refused with CircuitOpen for reset_timeout seconds. After that a
+    single probe call is let through (half-open): success closes the circuit,
+    failure opens it for another reset_timeout.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.rejected = 0
+
+    def allow(self):
+        """Raise CircuitOpen unless a call may go ahead now."""
+        with self.lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half-open'
+            if self.state == 'closed' or (self.state == 'half-open' and not self.probing):
+                self.probing = self.state == 'half-open'
+                return
+            self.rejected += 1
+            raise CircuitOpen(f"model backend unavailable, retrying in {max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)):.0f}s")
+
+    def record(self, ok):
+        """Record the outcome of an allowed call."""
+        with self.lock:
+            self.probing = False
+            if ok:
+                if self.state != 'closed':
+                    log.info("Model backend recovered, closing the circuit.")
+                self.state = 'closed'
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == 'half-open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    log.warning(f"Opening the circuit for {self.reset_timeout}s after {self.failures} failures.")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        """Current state, consecutive failures and calls refused while open."""
+        with self.lock:
+            return {'state': self.state, 'failures': self.failures, 'rejected': self.rejected}
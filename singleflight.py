@@ -0,0 +1,96 @@
+import contextvars
+import logging
+import threading
+
+log = logging.getLogger("quiz.singleflight")
+
+
+class Flight:
+    """Updates produced by one in-flight call, shared by every caller attached to it."""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.updates = []
+        self.error = None
+        self.done = False
+        self.callers = 1
+
+    def publish(self, update):
+        with self.cond:
+            self.updates.append(update)
+            self.cond.notify_all()
+
+    def finish(self, error=None):
+        with self.cond:
+            self.error = error
+            self.done = True
+            self.cond.notify_all()
+
+    def __iter__(self):
+        # Updates are snapshots, so a caller that falls behind skips to the newest one
+        seen = 0
+        while True:
+            with self.cond:
+                while len(self.updates) == seen and not self.done:
+                    self.cond.wait()
+                if len(self.updates) > seen:
+                    seen = len(self.updates)
+                    update = self.updates[-1]
+                elif self.error is not None:
+                    raise self.error
+                else:
+                    return
+            yield update
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls onto one producer.
+
+    The first call for a key runs produce() on its own thread; calls with the
+    same key that arrive while it is running attach to it instead of starting
+    another. Every caller receives the producer's updates (the newest one
+    whenever it catches up) and, at the end, its result or exception. The
+    producer keeps running if its original caller goes away, so the others
+    still get their result. Finished flights are forgotten; completed results
+    are the cache's job.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def stream(self, key, produce):
+        """Yield the updates of the in-flight call for key, starting produce() if there is none."""
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is None:
+                flight = self.flights[key] = Flight()
+                self.started += 1
+                # The producer runs in the first caller's context, so its logs carry that request's ID
+                context = contextvars.copy_context()
+                threading.Thread(target=context.run, args=(self._run, key, flight, produce), daemon=True).start()
+            else:
+                flight.callers += 1
+                self.coalesced += 1
+                log.info(f"Joined in-flight generation ({flight.callers} callers waiting on it).")
+        return iter(flight)
+
+    def _run(self, key, flight, produce):
+        error = None
+        try:
+            for update in produce():
+                flight.publish(update)
+        except Exception as e:
+            error = e
+        finally:
+            # Stop accepting callers before finishing, so nobody attaches to a flight that has ended
+            with self.lock:
+                del self.flights[key]
+            flight.finish(error)
+
+    def stats(self):
+        """Flights running now and lifetime counts of started and coalesced calls."""
+        with self.lock:
+            return {'in_flight': len(self.flights), 'started': self.started, 'coalesced': self.coalesced}
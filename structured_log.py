@@ -0,0 +1,135 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Parent of every logger in the app ("quiz.backends", "quiz.core", ...)
+LOGGER_NAME = "quiz"
+
+request_id_var = contextvars.ContextVar('request_id', default=None)
+
+# Attributes every LogRecord has; anything else on a record came from extra= and is logged as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {'message', 'asctime', 'request_id', 'taskName'}
+
+
+def new_request_id():
+    return uuid.uuid4().hex[:12]
+
+
+@contextmanager
+def request_context(request_id):
+    """Tag log records written in the block with request_id."""
+    token = request_id_var.set(request_id)
+    try:
+        yield
+    finally:
+        request_id_var.reset(token)
+
+
+def in_request(request_id, fn):
+    """Wrap fn to run with request_id set, e.g. as the target of a new thread."""
+    def run(*args, **kwargs):
+        with request_context(request_id):
+            return fn(*args, **kwargs)
+    return lambda *args, **kwargs: contextvars.copy_context().run(run, *args, **kwargs)
+
+
+def in_context(fn):
+    """Wrap fn to run in a copy of the current context, so pool threads keep the caller's request ID."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the current request ID, in the thread that logged it."""
+
+    def filter(self, record):
+        if getattr(record, 'request_id', None) is None:
+            record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Format a record as one JSON object per line: time, level, logger, request ID, message and extra fields."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', None),
+            'msg': record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+        if record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RecordQueueHandler(QueueHandler):
+    """Queue records with their message and traceback already rendered, leaving the JSON formatting to the listener."""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class ResponseSampler:
+    """Decide which raw model responses are logged.
+
+    mode is "all", "off", "failure" (only replies that didn't parse into the
+    questions asked for) or a fraction such as "0.01" for a random 1%.
+    """
+
+    def __init__(self, mode="failure"):
+        self.mode = mode.strip().lower()
+        try:
+            self.rate = float(self.mode)
+        except ValueError:
+            self.rate = None
+
+    def should_log(self, failed):
+        if self.rate is not None:
+            return random.random() < self.rate
+        return self.mode == "all" or (self.mode == "failure" and failed)
+
+
+def setup_logging(level="INFO", stream=None):
+    """Send the app's loggers to stream (stderr by default) as JSON lines.
+
+    Records are put on an in-memory queue and written by a listener thread,
+    so logging never blocks the request path on I/O. Safe to call more than once.
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level.upper())
+    if logger.handlers:
+        return logger
+
+    records = queue.SimpleQueue()
+    queue_handler = RecordQueueHandler(records)
+    queue_handler.addFilter(RequestIdFilter())
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter())
+    listener = QueueListener(records, output)
+    listener.start()
+    # Flush what is still queued when the process exits
+    atexit.register(listener.stop)
+
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+    return logger
@@ -0,0 +1,148 @@
+import json
+import re
+
+VALID_DIFFICULTIES = {'easy', 'medium', 'hard'}
+OPTION_COUNT = 4
+# Answers each question type may have; other types take any non-empty answer
+VALID_ANSWERS = {'MCQ': ('A', 'B', 'C', 'D'), 'True/False': ('True', 'False')}
+_STRUCTURAL = re.compile(r'[{}\[\]"\\]')
+
+
+def question_schema(question_type):
+    """JSON schema for a {"questions": [...]} response of the given question type."""
+    properties = {
+        'difficulty': {'type': 'string', 'enum': ['Easy', 'Medium', 'Hard']},
+        'question': {'type': 'string'},
+    }
+    if question_type == "MCQ":
+        properties['options'] = {
+            'type': 'array', 'items': {'type': 'string'}, 'minItems': OPTION_COUNT, 'maxItems': OPTION_COUNT
+        }
+    if question_type in VALID_ANSWERS:
+        properties['answer'] = {'type': 'string', 'enum': list(VALID_ANSWERS[question_type])}
+    else:
+        properties['answer'] = {'type': 'string'}
+    item = {'type': 'object', 'properties': properties, 'required': list(properties)}
+    return {
+        'type': 'object',
+        'properties': {'questions': {'type': 'array', 'items': item}},
+        'required': ['questions'],
+    }
+
+
+def response_format(question_type):
+    """OpenAI-style response_format constraining the model to question_schema (Ollama maps it to format)."""
+    return {'type': 'json_schema', 'json_schema': {'name': 'quiz_questions', 'schema': question_schema(question_type)}}
+
+
+def validate_question(item, question_type):
+    """Convert a decoded question object into a question dict, or return None if it is incomplete or its answer is invalid."""
+    if not isinstance(item, dict):
+        return None
+    difficulty = str(item.get('difficulty', '')).strip().lower()
+    text = item.get('question')
+    answer = item.get('answer')
+    if difficulty not in VALID_DIFFICULTIES or not isinstance(text, str) or not text.strip() or answer is None:
+        return None
+    question = {'difficulty': difficulty}
+    if question_type == "MCQ":
+        options = item.get('options')
+        if not isinstance(options, list) or len(options) != OPTION_COUNT:
+            return None
+        question['options'] = [str(option).strip() for option in options]
+    question['text'] = text.strip()
+    answer = str(answer).strip()
+    if question_type == "MCQ":
+        answer = answer.upper()
+    elif question_type == "True/False":
+        answer = answer.capitalize()
+    if not answer or answer not in VALID_ANSWERS.get(question_type, (answer,)):
+        return None
+    question['answer'] = answer
+    return question
+
+
+class JsonQuestionStreamParser:
+    """Incrementally decode a streamed JSON list of questions into validated question dicts.
+
+    Same interface as the line-based QuestionStreamParser. Each chunk is
+    scanned once while tracking string and nesting state, and every object
+    that is an element of an array is decoded and validated as soon as its
+    closing brace arrives, so questions can be counted against quotas while
+    the response is still streaming.
+    """
+
+    def __init__(self, question_type):
+        self.question_type = question_type
+        self.buffer = ""
+        self.stack = []
+        self.in_string = False
+        self.escaped = False
+        self.item_start = None
+        self.item_depth = 0
+        self.decoded = 0
+        self.invalid = 0
+
+    def feed(self, content):
+        """Consume a chunk of text and return the questions completed by it."""
+        questions = []
+        offset = len(self.buffer)
+        self.buffer += content
+        skip = offset + 1 if self.escaped else offset
+        self.escaped = False
+        # Jump between structural characters instead of stepping through every one
+        for match in _STRUCTURAL.finditer(self.buffer, offset):
+            i = match.start()
+            if i < skip:
+                continue
+            ch = match.group()
+            if self.in_string:
+                if ch == '\\':
+                    # Skip the escaped character, which may arrive in the next chunk
+                    skip = i + 2
+                    self.escaped = skip > len(self.buffer)
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == '{' or ch == '[':
+                if ch == '{' and self.item_start is None and self.stack and self.stack[-1] == '[':
+                    self.item_start = i
+                    self.item_depth = len(self.stack)
+                self.stack.append(ch)
+            elif ch == '}' or ch == ']':
+                if self.stack:
+                    self.stack.pop()
+                if ch == '}' and self.item_start is not None and len(self.stack) == self.item_depth:
+                    question = self._decode(self.buffer[self.item_start:i + 1])
+                    self.item_start = None
+                    if question:
+                        questions.append(question)
+
+        # Only the unfinished element, if any, needs to be kept
+        if self.item_start is None:
+            self.buffer = ""
+        else:
+            self.buffer = self.buffer[self.item_start:]
+            self.item_start = 0
+        return questions
+
+    def close(self):
+        """Finish the stream; an element cut off mid-object is dropped."""
+        return []
+
+    def _decode(self, text):
+        self.decoded += 1
+        try:
+            question = validate_question(json.loads(text), self.question_type)
+        except ValueError:
+            question = None
+        if question is None:
+            self.invalid += 1
+        return question
+
+
+def parse_json_questions(response, question_type):
+    """Decode a complete JSON response into question dicts."""
+    parser = JsonQuestionStreamParser(question_type)
+    return parser.feed(response) + parser.close()
@@ -0,0 +1,63 @@
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+from chunk_index import ChunkIndex
+
+CHUNKS = [
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "Chlorophyll in the chloroplasts absorbs mostly blue and red light; green light is reflected.",
+    "The light-dependent reactions split water and release oxygen.",
+    "The Calvin cycle fixes carbon dioxide into sugars, using ATP and NADPH from the light reactions.",
+    "Stomata open to let carbon dioxide in, and close to save water during droughts.",
+    "Naïve café plants? Photosynthesis, photosynthesis, PHOTOSYNTHESIS!",
+]
+QUERIES = ["light energy", "carbon dioxide water", "photosynthesis", "café", "chlorophyll absorbs red", "mitochondria"]
+
+
+def tokenize(text):
+    # Runs of ASCII letters and digits or non-ASCII characters, like the index's byte table
+    return re.findall(r"[a-z0-9\u0080-\U0010ffff]+", text.lower())
+
+
+def naive_bm25(chunks, query, k1=1.2, b=0.75):
+    docs = [Counter(tokenize(chunk)) for chunk in chunks]
+    lengths = [sum(doc.values()) for doc in docs]
+    avg_len = max(sum(lengths) / len(docs), 1.0)
+    scores = []
+    for doc, length in zip(docs, lengths):
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(term in other for other in docs)
+            if term not in doc:
+                continue
+            idf = math.log1p((len(docs) - df + 0.5) / (df + 0.5))
+            tf = doc[term]
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_len))
+        scores.append(score)
+    return scores
+
+
+def test_scores_match_plain_bm25():
+    index = ChunkIndex(CHUNKS)
+    for query in QUERIES:
+        np.testing.assert_allclose(index.score(query), naive_bm25(CHUNKS, query), rtol=1e-12, atol=1e-12)
+
+
+def test_empty_text():
+    index = ChunkIndex.from_text("")
+    assert index.chunks == []
+    assert len(index.score("light")) == 0
+    assert index.select(100, "light") == ""
+    assert index.select(100) == ""
+
+
+def test_punctuation_only_text():
+    text = "!!! ... --- ??? (*) ;;"
+    index = ChunkIndex.from_text(text)
+    assert index.chunks == [text]
+    assert index.score("light").tolist() == [0.0]
+    # No query terms match, so selection falls back to covering the document
+    assert index.select(100, "light") == text
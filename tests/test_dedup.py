@@ -0,0 +1,32 @@
+from dedup import NearDuplicateFilter
+
+GAS_OPTIONS = ["Oxygen", "Carbon dioxide", "Nitrogen", "Hydrogen"]
+
+
+def test_keeps_statement_with_a_different_answer():
+    deduper = NearDuplicateFilter()
+    assert deduper.add({'difficulty': 'easy', 'text': "Photosynthesis occurs in the chloroplasts.", 'answer': "True"})
+    assert deduper.add({'difficulty': 'easy', 'text': "Photosynthesis occurs in the mitochondria.", 'answer': "False"})
+
+
+def test_keeps_mcqs_that_share_their_options():
+    deduper = NearDuplicateFilter()
+    produced = {'difficulty': 'easy', 'text': "What gas is produced during photosynthesis?", 'options': GAS_OPTIONS, 'answer': "A"}
+    consumed = {'difficulty': 'easy', 'text': "What gas is consumed during photosynthesis?", 'options': GAS_OPTIONS, 'answer': "B"}
+    assert deduper.filter([produced, consumed]) == [produced, consumed]
+
+
+def test_drops_rewordings_with_the_same_answer():
+    deduper = NearDuplicateFilter()
+    original = {'difficulty': 'medium', 'text': "Which organelle is known as the powerhouse of the cell?", 'answer': "Mitochondria"}
+    reworded = {'difficulty': 'hard', 'text': "Which organelle is known as the powerhouse of the cell", 'answer': "mitochondria."}
+    assert deduper.filter([original, reworded]) == [original]
+    assert deduper.dropped == 1
+
+
+def test_mcq_answers_compare_by_option_text():
+    deduper = NearDuplicateFilter()
+    first = {'difficulty': 'easy', 'text': "What gas is produced during photosynthesis?", 'options': GAS_OPTIONS, 'answer': "A"}
+    shuffled = {'difficulty': 'easy', 'text': "What gas is produced during photosynthesis?", 'options': GAS_OPTIONS[::-1], 'answer': "D"}
+    assert deduper.add(first)
+    assert not deduper.add(shuffled)
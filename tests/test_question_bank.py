@@ -0,0 +1,28 @@
+from question_bank import QuestionBank, make_source
+
+QUESTIONS = [
+    {'difficulty': 'easy', 'text': "Which gas dominates volcanic emissions?", 'answer': "Water vapour"},
+    {'difficulty': 'easy', 'text': "What is molten rock below the surface called?", 'answer': "Magma"},
+]
+
+
+def make_bank(tmp_path):
+    bank = QuestionBank(str(tmp_path / "questions.db"))
+    bank.add(make_source("Volcanoes"), "Subjective", QUESTIONS)
+    return bank
+
+
+def test_take_skips_questions_on_cooldown(tmp_path):
+    bank = make_bank(tmp_path)
+    source = make_source("Volcanoes")
+    assert len(bank.take(source, "Subjective", "easy", 5)) == 2
+    assert bank.take(source, "Subjective", "easy", 5) == []
+    assert bank.available(source, "Subjective", "easy") == 0
+
+
+def test_release_returns_taken_questions(tmp_path):
+    bank = make_bank(tmp_path)
+    source = make_source("Volcanoes")
+    taken = bank.take(source, "Subjective", "easy", 5)
+    bank.release(source, "Subjective", taken)
+    assert bank.available(source, "Subjective", "easy") == 2
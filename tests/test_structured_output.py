@@ -0,0 +1,60 @@
+import json
+
+from structured_output import JsonQuestionStreamParser, parse_json_questions, validate_question
+
+MCQ = {'difficulty': 'Easy', 'question': 'Which gas do plants absorb?', 'options': ['Oxygen', 'Carbon dioxide', 'Nitrogen', 'Helium'], 'answer': 'B'}
+TRUE_FALSE = {'difficulty': 'Hard', 'question': 'Photosynthesis occurs in the mitochondria.', 'answer': 'False'}
+
+
+def feed_in_chunks(text, question_type, size):
+    parser = JsonQuestionStreamParser(question_type)
+    questions = []
+    for i in range(0, len(text), size):
+        questions += parser.feed(text[i:i + size])
+    return questions + parser.close(), parser
+
+
+def test_validate_question_normalises_fields():
+    question = validate_question(dict(MCQ, answer=' b '), "MCQ")
+    assert question == {'difficulty': 'easy', 'options': MCQ['options'], 'text': MCQ['question'], 'answer': 'B'}
+    assert validate_question(dict(TRUE_FALSE, answer='true'), "True/False")['answer'] == 'True'
+
+
+def test_validate_question_rejects_answers_outside_the_type():
+    assert validate_question(dict(MCQ, answer='E'), "MCQ") is None
+    assert validate_question(dict(MCQ, answer='Carbon dioxide'), "MCQ") is None
+    assert validate_question(dict(TRUE_FALSE, answer='Maybe'), "True/False") is None
+    assert validate_question(dict(TRUE_FALSE, answer='A'), "True/False") is None
+    assert validate_question(dict(TRUE_FALSE, answer=''), "Subjective") is None
+
+
+def test_escapes_split_across_chunks():
+    item = dict(MCQ, question='Which "gas" do plants absorb? \\ {not a brace}')
+    response = json.dumps({'questions': [item, dict(MCQ, answer='C')]})
+    expected = parse_json_questions(response, "MCQ")
+    assert [q['text'] for q in expected] == [item['question'], MCQ['question']]
+    for size in range(1, 12):
+        questions, parser = feed_in_chunks(response, "MCQ", size)
+        assert questions == expected
+        assert parser.invalid == 0
+
+
+def test_preamble_and_code_fence_are_skipped():
+    response = "Sure! Here are your questions:\n```json\n" + json.dumps({'questions': [TRUE_FALSE]}) + "\n```"
+    questions, parser = feed_in_chunks(response, "True/False", 5)
+    assert [q['text'] for q in questions] == [TRUE_FALSE['question']]
+    assert parser.decoded == 1
+
+
+def test_invalid_items_are_counted_and_dropped():
+    items = [MCQ, dict(MCQ, answer='E'), dict(MCQ, options=['Oxygen']), {'difficulty': 'Easy'}, dict(MCQ, difficulty='Trivial')]
+    questions, parser = feed_in_chunks(json.dumps({'questions': items}), "MCQ", 7)
+    assert len(questions) == 1
+    assert parser.decoded == 5
+    assert parser.invalid == 4
+
+
+def test_unfinished_item_is_dropped_on_close():
+    response = json.dumps({'questions': [TRUE_FALSE, TRUE_FALSE]})
+    questions, parser = feed_in_chunks(response[:-20], "True/False", 9)
+    assert len(questions) == 1
@@ -0,0 +1,65 @@
+import math
+
+# Typical reply length of one question of each type, in tokens, including its formatting
+QUESTION_TOKENS = {
+    "MCQ": 110,
+    "True/False": 50,
+    "Fill in the Blank": 60,
+    "Subjective": 110,
+}
+
+
+def estimate_tokens(text):
+    """Fast local token estimate for English text: the larger of 4/3 tokens per word and one token per 4 characters."""
+    if not text:
+        return 0
+    return max(math.ceil(len(text.split()) * 4 / 3), math.ceil(len(text) / 4))
+
+
+class TokenBudget:
+    """Split a model's context window between prompt, document context and reply.
+
+    max_tokens for each request is sized from the number and type of
+    questions asked for, with a margin so replies aren't cut short, instead of
+    always reserving max_output_tokens. A reply never reserves more than half
+    the window, so large requests still get document context and are split
+    into requests of at most max_questions each. Document context fills what is left of the window, up
+    to context_tokens.
+    """
+
+    def __init__(self, context_window=4096, context_tokens=1000, max_output_tokens=4000, min_output_tokens=128,
+                 overhead_tokens=32, margin=1.25):
+        self.context_window = context_window
+        self.context_tokens = context_tokens
+        self.max_output_tokens = max_output_tokens
+        self.min_output_tokens = min_output_tokens
+        self.overhead_tokens = overhead_tokens
+        self.margin = margin
+
+    def output_cap(self):
+        """Most tokens any reply may reserve."""
+        return min(self.max_output_tokens, self.context_window // 2)
+
+    def output_tokens(self, question_type, count):
+        """max_tokens for a reply holding count questions of the given type."""
+        expected = self.overhead_tokens + count * QUESTION_TOKENS.get(question_type, QUESTION_TOKENS["MCQ"])
+        return max(self.min_output_tokens, min(self.output_cap(), math.ceil(expected * self.margin)))
+
+    def max_questions(self, question_type):
+        """Most questions of the given type one reply can hold without being cut off (at least one)."""
+        per_question = QUESTION_TOKENS.get(question_type, QUESTION_TOKENS["MCQ"])
+        return max(1, int((self.output_cap() / self.margin - self.overhead_tokens) // per_question))
+
+    def context_tokens_for(self, prompt_tokens, output_tokens):
+        """Tokens available for document context once the prompt and the reply are reserved."""
+        return max(0, min(self.context_tokens, self.context_window - prompt_tokens - output_tokens))
+
+    def trim(self, text, tokens):
+        """Cut text at a word boundary so its estimate fits within tokens."""
+        estimate = estimate_tokens(text)
+        while estimate > tokens:
+            cut = int(len(text) * tokens / estimate)
+            space = text.rfind(' ', 0, cut)
+            text = text[:space if space > 0 else cut]
+            estimate = estimate_tokens(text)
+        return text